@@ -0,0 +1,142 @@
+"""Benchmark coordinator refreshes against the local fake Shine Monitor API.
+
+Reports refresh latency percentiles, requests per cycle and memory for a
+range of plant counts::
+
+    python bench/bench_coordinator.py --plants 1 10 100 1000 --cycles 10
+
+Requires Home Assistant and aiohttp to be installed.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from homeassistant.core import HomeAssistant  # noqa: E402
+from homeassistant.helpers.aiohttp_client import (  # noqa: E402
+    async_create_clientsession,
+)
+
+from custom_components.shine_monitor.api import ShineMonitorApiClient  # noqa: E402
+from custom_components.shine_monitor.auth import ShineMonitorAuthManager  # noqa: E402
+from custom_components.shine_monitor.coordinator import (  # noqa: E402
+    ShineMonitorDataUpdateCoordinator,
+)
+from custom_components.shine_monitor.ratelimit import RequestScheduler  # noqa: E402
+from fake_server import FakeShineMonitorServer  # noqa: E402
+
+
+def create_hass(config_dir):
+    """Create a bare Home Assistant instance for the benchmark."""
+    try:
+        hass = HomeAssistant(config_dir)
+    except TypeError:
+        hass = HomeAssistant()
+        hass.config.config_dir = config_dir
+    return hass
+
+
+def percentile(values, fraction):
+    """Return the ``fraction`` percentile of ``values``."""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def bench_plants(hass, server, plants, cycles, rate=0):
+    """Run ``cycles`` refreshes over ``plants`` plants and return the results."""
+    server.plants = [
+        {"pid": 1000 + index, "name": f"Plant {index + 1}"} for index in range(plants)
+    ]
+    client = ShineMonitorApiClient(
+        async_create_clientsession(hass),
+        server.username,
+        server.password,
+        server.company_key,
+        api_url=server.url,
+        scheduler=RequestScheduler(rate, burst=max(1, int(rate * 4))) if rate else None,
+    )
+    client.auth = ShineMonitorAuthManager(hass, client, f"bench_{plants}")
+    coordinator = ShineMonitorDataUpdateCoordinator(hass, client)
+
+    server.reset_counters()
+    tracemalloc.start()
+    latencies = []
+    try:
+        for _ in range(cycles):
+            start = time.perf_counter()
+            await coordinator.async_refresh()
+            latencies.append(time.perf_counter() - start)
+            if not coordinator.last_update_success:
+                raise RuntimeError(f"Refresh failed: {coordinator.last_exception}")
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        client.auth.async_shutdown()
+
+    return {
+        "plants": plants,
+        "p50": statistics.median(latencies) * 1000,
+        "p95": percentile(latencies, 0.95) * 1000,
+        "p99": percentile(latencies, 0.99) * 1000,
+        "requests": sum(server.requests.values()) / cycles,
+        "peak_mib": peak / 2**20,
+    }
+
+
+async def run(args):
+    """Run the benchmark for every requested plant count."""
+    server = FakeShineMonitorServer(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        devices_per_plant=args.devices_per_plant,
+    )
+    await server.async_start()
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = create_hass(config_dir)
+        print(
+            f"{'plants':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+            f"{'req/cycle':>10} {'peak MiB':>9}"
+        )
+        try:
+            for plants in args.plants:
+                result = await bench_plants(
+                    hass, server, plants, args.cycles, args.rate
+                )
+                print(
+                    f"{result['plants']:>7} {result['p50']:>9.1f} {result['p95']:>9.1f} "
+                    f"{result['p99']:>9.1f} {result['requests']:>10.1f} "
+                    f"{result['peak_mib']:>9.2f}"
+                )
+        finally:
+            await server.async_stop()
+            await hass.async_stop(force=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--plants", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--cycles", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--devices-per-plant", type=int, default=0)
+    parser.add_argument(
+        "--rate", type=float, default=0, help="requests per second, 0 for unlimited"
+    )
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
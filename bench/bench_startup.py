@@ -0,0 +1,174 @@
+"""Benchmark config entry startup against the local fake Shine Monitor API.
+
+Reports, for a range of entry counts, the time until the sensor platform of
+every entry has registered its plant entities and the time until every entry
+has its first data, for the deferred setup and for the former blocking first
+refresh. Entries have no snapshot and poll all plants, like a fresh install::
+
+    python bench/bench_startup.py --entries 1 10 100
+
+Requires Home Assistant and aiohttp to be installed.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_coordinator import create_hass  # noqa: E402
+
+from custom_components.shine_monitor import (  # noqa: E402
+    MAX_STARTUP_DELAY,
+    STARTUP_STAGGER,
+    async_close_coordinator,
+    async_create_coordinator,
+    async_start_coordinator,
+)
+from custom_components.shine_monitor.const import DOMAIN  # noqa: E402
+from custom_components.shine_monitor.sensor import (  # noqa: E402
+    ShineMonitorPlantSensor,
+    async_setup_entry as async_setup_sensors,
+)
+from custom_components.shine_monitor.ratelimit import (  # noqa: E402
+    DATA_SCHEDULERS,
+    RequestScheduler,
+)
+from fake_server import FakeShineMonitorServer  # noqa: E402
+
+MODES = ("deferred", "blocking")
+
+
+def make_entry(server, entry_id, unloads):
+    """Return a stand-in config entry for the fake server account.
+
+    Like the config flow, the entry data lists the plants of the account.
+    """
+    return SimpleNamespace(
+        entry_id=entry_id,
+        title=f"Shine Monitor - {server.username}",
+        async_on_unload=unloads.append,
+        data={
+            "username": server.username,
+            "password": server.password,
+            "company_key": server.company_key,
+            "token": None,
+            "secret": None,
+            "api_url": server.url,
+            "all_plants": True,
+            "plant_ids": [],
+            "plants": {str(plant["pid"]): plant["name"] for plant in server.plants},
+        },
+        options={},
+    )
+
+
+async def bench_entries(hass, server, entries, mode):
+    """Set up ``entries`` entries one after another and return the timings."""
+    server.reset_counters()
+    coordinators = []
+    tasks = []
+    unloads = []
+    plant_entities = 0
+
+    def _async_add_entities(new_entities):
+        nonlocal plant_entities
+        plant_entities += sum(
+            isinstance(entity, ShineMonitorPlantSensor) for entity in new_entities
+        )
+
+    started = time.perf_counter()
+    try:
+        for index in range(entries):
+            entry = make_entry(server, f"bench_startup_{mode}_{entries}_{index}", unloads)
+            coordinator = await async_create_coordinator(hass, entry)
+            coordinators.append(coordinator)
+            hass.data.setdefault(DOMAIN, {})[entry.entry_id] = coordinator
+            if mode == "blocking":
+                await async_start_coordinator(hass, coordinator)
+                await async_setup_sensors(hass, entry, _async_add_entities)
+            else:
+                await async_setup_sensors(hass, entry, _async_add_entities)
+                delay = random.uniform(
+                    0, min(MAX_STARTUP_DELAY, STARTUP_STAGGER * entries)
+                )
+                tasks.append(
+                    asyncio.create_task(async_start_coordinator(hass, coordinator, delay))
+                )
+        entities_ready = time.perf_counter() - started
+        entities = plant_entities
+        await asyncio.gather(*tasks)
+        data_ready = time.perf_counter() - started
+        failed = sum(not coordinator.last_update_success for coordinator in coordinators)
+    finally:
+        for unload in unloads:
+            unload()
+        hass.data.get(DOMAIN, {}).clear()
+        for coordinator in coordinators:
+            await async_close_coordinator(coordinator)
+
+    return {
+        "entries": entries,
+        "mode": mode,
+        "entities_ms": entities_ready * 1000,
+        "entities": entities,
+        "data_ms": data_ready * 1000,
+        "requests": sum(server.requests.values()),
+        "failed": failed,
+    }
+
+
+async def run(args):
+    """Run the benchmark for every requested entry count."""
+    server = FakeShineMonitorServer(
+        plants=args.plants, latency=args.latency, jitter=args.jitter
+    )
+    await server.async_start()
+    with tempfile.TemporaryDirectory() as config_dir:
+        os.makedirs(os.path.join(config_dir, ".storage"))
+        hass = create_hass(config_dir)
+        rate = args.rate or 1e6
+        hass.data.setdefault(DATA_SCHEDULERS, {})[server.username] = RequestScheduler(
+            rate, burst=max(1, int(rate * 4))
+        )
+        print(
+            f"{'entries':>7} {'mode':>9} {'entities ms':>12} {'entities':>9} "
+            f"{'data ms':>10} {'requests':>9} {'failed':>7}"
+        )
+        try:
+            for entries in args.entries:
+                for mode in MODES:
+                    result = await bench_entries(hass, server, entries, mode)
+                    print(
+                        f"{result['entries']:>7} {result['mode']:>9} "
+                        f"{result['entities_ms']:>12.1f} {result['entities']:>9} "
+                        f"{result['data_ms']:>10.1f} "
+                        f"{result['requests']:>9} {result['failed']:>7}"
+                    )
+        finally:
+            await server.async_stop()
+            await hass.async_stop(force=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--plants", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument(
+        "--rate", type=float, default=0, help="requests per second, 0 for unlimited"
+    )
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+"""Local fake of the Shine Monitor cloud API for benchmarks and offline runs.
+
+Run standalone with::
+
+    python bench/fake_server.py --plants 50 --latency 0.05
+
+and point the integration at ``http://127.0.0.1:8765/public/`` through the
+advanced ``api_url`` field of the config flow.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import random
+import secrets
+import time
+from collections import Counter
+
+from aiohttp import web
+
+API_PATH = "/public/"
+
+
+def _sha1(value):
+    return hashlib.sha1(value.encode("utf-8")).hexdigest()
+
+
+class FakeShineMonitorServer:
+    """In-process aiohttp server speaking the subset of the API the integration uses.
+
+    Requests are signature-checked exactly like the real service. Latency,
+    a random error rate and token expiry (ERR_NO_AUTH) can be injected.
+    """
+
+    def __init__(
+        self,
+        plants=1,
+        username="demo",
+        password="demo",
+        company_key="demo-key",
+        latency=0.0,
+        jitter=0.0,
+        error_rate=0.0,
+        token_lifetime=7 * 24 * 3600,
+        devices_per_plant=0,
+        seed=0,
+    ):
+        """Initialize the fake server state."""
+        self.username = username
+        self.password = password
+        self.company_key = company_key
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.token_lifetime = token_lifetime
+        self.devices_per_plant = devices_per_plant
+        self.plants = [
+            {"pid": 1000 + index, "name": f"Plant {index + 1}"} for index in range(plants)
+        ]
+        self.requests = Counter()
+        self.rejected = Counter()
+        self._tokens = {}
+        self._random = random.Random(seed)
+        self._runner = None
+        self.url = None
+
+    async def async_start(self, host="127.0.0.1", port=0):
+        """Start serving and return the API base URL."""
+        app = web.Application()
+        app.router.add_get(API_PATH, self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.url = f"http://{host}:{port}{API_PATH}"
+        return self.url
+
+    async def async_stop(self):
+        """Stop serving."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def expire_tokens(self):
+        """Invalidate every issued token."""
+        self._tokens.clear()
+
+    def reset_counters(self):
+        """Reset the request counters."""
+        self.requests.clear()
+        self.rejected.clear()
+
+    async def _handle(self, request):
+        query = request.query
+        action = query.get("action", "")
+        self.requests[action] += 1
+
+        delay = self.latency + self._random.uniform(0, self.jitter)
+        if delay:
+            await asyncio.sleep(delay)
+        if self.error_rate and self._random.random() < self.error_rate:
+            self.rejected[action] += 1
+            return web.json_response({"err": 1, "desc": "ERR_FAIL"})
+
+        raw = request.query_string
+        tail_start = raw.find("&action=")
+        if tail_start < 0:
+            return _error("ERR_FORMAT_ERROR")
+        tail = raw[tail_start:]
+
+        if action == "auth":
+            return self._auth(query, tail)
+
+        token = query.get("token")
+        issued = self._tokens.get(token)
+        if issued is None or time.time() - issued[1] > self.token_lifetime:
+            self.rejected[action] += 1
+            return _error("ERR_NO_AUTH")
+        secret = issued[0]
+        if query.get("sign") != _sha1(query.get("salt", "") + secret + token + tail):
+            self.rejected[action] += 1
+            return _error("ERR_SIGN")
+
+        handler = self._actions().get(action)
+        if handler is None:
+            return _error("ERR_FORMAT_ERROR")
+        return handler(query)
+
+    def _actions(self):
+        return {
+            "queryPlants": self._query_plants,
+            "queryPlantsActiveOuputPowerCurrent": self._current_power,
+            "queryPlantEnergyDay": self._energy_day,
+            "queryPlantsProfitOneDay": self._profit_day,
+            "queryPlantCurrentData": self._current_data,
+            "webQueryDeviceEs": self._query_devices,
+            "queryDeviceLastData": self._device_last_data,
+        }
+
+    def _auth(self, query, tail):
+        expected = _sha1(query.get("salt", "") + _sha1(self.password) + tail)
+        if query.get("usr") != self.username or query.get("company-key") != self.company_key:
+            return _error("ERR_USER_NOT_FOUND")
+        if query.get("sign") != expected:
+            return _error("ERR_PASSWORD_ERROR")
+        token = secrets.token_hex(16)
+        secret = secrets.token_hex(16)
+        self._tokens[token] = (secret, time.time())
+        return _ok(
+            {
+                "token": token,
+                "secret": secret,
+                "expire": self.token_lifetime,
+                "usr": self.username,
+            }
+        )
+
+    def _plant(self, query):
+        pid = query.get("plantid", "")
+        if not pid.isdigit() or not 0 <= int(pid) - 1000 < len(self.plants):
+            return None
+        return int(pid)
+
+    def _query_plants(self, query):
+        page = int(query.get("page", 0))
+        pagesize = int(query.get("pagesize", len(self.plants) or 1))
+        chunk = self.plants[page * pagesize : (page + 1) * pagesize]
+        return _ok(
+            {
+                "page": page,
+                "pagesize": pagesize,
+                "total": len(self.plants),
+                "plant": chunk,
+            }
+        )
+
+    def _current_power(self, query):
+        pid = self._plant(query)
+        if pid is None:
+            return _error("ERR_NO_RECORD")
+        return _ok({"outputPower": f"{(pid % 7) + self._random.random():.3f}"})
+
+    def _energy_day(self, query):
+        pid = self._plant(query)
+        if pid is None:
+            return _error("ERR_NO_RECORD")
+        return _ok({"energy": f"{(pid % 13) * 2.5:.1f}"})
+
+    def _profit_day(self, query):
+        pid = self._plant(query)
+        if pid is None:
+            return _error("ERR_NO_RECORD")
+        energy = (pid % 13) * 2.5
+        return _ok(
+            {
+                "plant": [
+                    {
+                        "pid": pid,
+                        "profit": f"{energy * 0.4:.2f}",
+                        "coal": f"{energy * 0.4:.2f}",
+                        "co2": f"{energy * 0.997:.2f}",
+                        "so2": f"{energy * 0.03:.2f}",
+                    }
+                ]
+            }
+        )
+
+    def _current_data(self, query):
+        pid = self._plant(query)
+        if pid is None:
+            return _error("ERR_NO_RECORD")
+        energy = (pid % 13) * 2.5
+        flows = {
+            "ENERGY_BUY_TODAY": energy * 0.3,
+            "ENERGY_SELL_TODAY": energy * 0.5,
+            "ENERGY_CHARGE_TODAY": energy * 0.2,
+            "ENERGY_DISCHARGE_TODAY": energy * 0.15,
+            "ENERGY_LOAD_TODAY": energy * 0.65,
+        }
+        # Odd plants report in Wh, like some datalogger firmwares do.
+        scale, unit = (1000, "Wh") if pid % 2 else (1, "kWh")
+        return _ok(
+            [
+                {"key": key, "val": f"{value * scale:.2f}", "unit": unit}
+                for key, value in flows.items()
+                if key in query.get("par", "").split(",")
+            ]
+        )
+
+    def _query_devices(self, query):
+        pid = self._plant(query)
+        if pid is None or not self.devices_per_plant:
+            return _error("ERR_NO_RECORD")
+        page = int(query.get("page", 0))
+        pagesize = int(query.get("pagesize", self.devices_per_plant))
+        devices = [
+            {
+                "pn": f"W{pid}{index:04d}",
+                "sn": f"SN{pid}{index:04d}",
+                "devcode": 512,
+                "devaddr": index + 1,
+                "alias": f"Inverter {pid}-{index + 1}",
+            }
+            for index in range(self.devices_per_plant)
+        ]
+        return _ok(
+            {
+                "page": page,
+                "pagesize": pagesize,
+                "total": len(devices),
+                "device": devices[page * pagesize : (page + 1) * pagesize],
+            }
+        )
+
+    def _device_last_data(self, query):
+        if not query.get("pn", "").startswith("W"):
+            return _error("ERR_NO_RECORD")
+        rand = self._random.random
+        fields = [
+            ("pv1_voltage", "PV1 Input voltage", f"{300 + rand() * 20:.1f}", "V"),
+            ("pv1_current", "PV1 Input current", f"{rand() * 10:.2f}", "A"),
+            ("ac_output_power", "AC output power", f"{rand() * 3000:.0f}", "W"),
+            ("inner_temperature", "Inner temperature", f"{35 + rand() * 10:.1f}", "°C"),
+            ("battery_soc", "Battery SOC", f"{rand() * 100:.0f}", "%"),
+        ]
+        return _ok(
+            [
+                {"id": field, "title": title, "val": val, "unit": unit}
+                for field, title, val, unit in fields
+            ]
+        )
+
+
+def _ok(dat):
+    return web.json_response({"err": 0, "desc": "ERR_NONE", "dat": dat})
+
+
+def _error(desc):
+    return web.json_response({"err": 1, "desc": desc})
+
+
+async def _serve(args):
+    server = FakeShineMonitorServer(
+        plants=args.plants,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        token_lifetime=args.token_lifetime,
+        devices_per_plant=args.devices_per_plant,
+    )
+    url = await server.async_start(args.host, args.port)
+    print(f"Serving fake Shine Monitor API on {url} (user demo / demo / demo-key)")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.async_stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--plants", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--token-lifetime", type=float, default=7 * 24 * 3600)
+    parser.add_argument("--devices-per-plant", type=int, default=0)
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
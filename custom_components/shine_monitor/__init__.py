@@ -1,38 +1,159 @@
 """Initialize the Shine Monitor integration for Home Assistant."""
 
+import asyncio
+import importlib
+import random
+from datetime import timedelta
+
 from homeassistant import config_entries
 from homeassistant.core import HomeAssistant
 from homeassistant.const import Platform
-from .const import DOMAIN
-from .coordinator import ShineMonitorDataUpdateCoordinator
+from homeassistant.helpers.aiohttp_client import async_create_clientsession
+from .aggregates import PlantAggregator
+from .api import ShineMonitorApiClient
+from .auth import ShineMonitorAuthManager, async_remove_stored_token
+from .const import (
+    API_URL,
+    CONF_FAST_LANE_INTERVAL,
+    CONF_GROUPS,
+    CONF_STALE_GRACE_PERIOD,
+    DEFAULT_FAST_LANE_INTERVAL,
+    DEFAULT_STALE_GRACE_PERIOD,
+    DOMAIN,
+)
+from .backfill import async_remove_checkpoints
+from .coordinator import ShineMonitorDataUpdateCoordinator, async_remove_snapshot
+from .export import async_remove_export_checkpoints
+from .fastlane import ShineMonitorFastLane
+from .history import ShineMonitorHistory, async_remove_history
+from .ratelimit import async_get_request_scheduler
+from .services import async_setup_services
 
 PLATFORMS = [Platform.SENSOR]
 
+STARTUP_STAGGER = 0.5
+MAX_STARTUP_DELAY = 30
+
 
 async def async_setup(hass: HomeAssistant, config: dict) -> bool:
     """Set up the Shine Monitor component."""
+    async_setup_services(hass)
     return True
 
 
 async def async_setup_entry(
     hass: HomeAssistant, entry: config_entries.ConfigEntry
 ) -> bool:
-    """Set up Shine Monitor from a config entry."""
+    """Set up Shine Monitor from a config entry.
+
+    Setup makes no cloud request: entities are created from the last snapshot,
+    or from placeholders of the plants listed by the config flow, and the first
+    refresh runs in the background.
+    """
     hass.data.setdefault(DOMAIN, {})
-    coordinator = ShineMonitorDataUpdateCoordinator(
+    coordinator = await async_create_coordinator(hass, entry)
+    hass.data[DOMAIN][entry.entry_id] = coordinator
+    try:
+        await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    except Exception:
+        hass.data[DOMAIN].pop(entry.entry_id)
+        await async_close_coordinator(coordinator)
+        raise
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
+    entry.async_create_background_task(
         hass,
+        async_start_coordinator(hass, coordinator, _startup_delay(hass)),
+        f"{DOMAIN} first refresh {entry.entry_id}",
+    )
+
+    fast_lane_interval = entry.options.get(
+        CONF_FAST_LANE_INTERVAL, DEFAULT_FAST_LANE_INTERVAL
+    )
+    if fast_lane_interval:
+        fast_lane = ShineMonitorFastLane(
+            hass, coordinator, entry.entry_id, fast_lane_interval
+        )
+        fast_lane.async_start()
+        entry.async_on_unload(fast_lane.async_stop)
+    return True
+
+
+async def async_create_coordinator(
+    hass: HomeAssistant, entry: config_entries.ConfigEntry
+) -> ShineMonitorDataUpdateCoordinator:
+    """Create the coordinator of an entry with its snapshot or placeholder data."""
+    # A session of its own on the shared Home Assistant connector; Home
+    # Assistant detaches it when the entry unloads or fails to set up.
+    client = ShineMonitorApiClient(
+        async_create_clientsession(hass),
         entry.data["username"],
         entry.data["password"],
         entry.data["company_key"],
-        entry.data["plant_id"],
         entry.data["token"],
         entry.data["secret"],
+        entry.data.get("token_expires_at", 0),
+        entry.data.get("api_url", API_URL),
+        async_get_request_scheduler(hass, entry.data["username"]),
     )
-    await coordinator.async_config_entry_first_refresh()
-    hass.data[DOMAIN][entry.entry_id] = coordinator
+    client.auth = ShineMonitorAuthManager(hass, client, entry.entry_id)
+    try:
+        await client.auth.async_load()
+        coordinator = ShineMonitorDataUpdateCoordinator(
+            hass,
+            client,
+            _entry_plant_ids(entry),
+            entry.entry_id,
+            timedelta(
+                minutes=entry.options.get(
+                    CONF_STALE_GRACE_PERIOD, DEFAULT_STALE_GRACE_PERIOD
+                )
+            ),
+        )
+        coordinator.history = ShineMonitorHistory(hass, entry.entry_id)
+        coordinator.aggregator = PlantAggregator(entry.options.get(CONF_GROUPS))
+        if not await coordinator.async_restore_snapshot():
+            coordinator.async_set_placeholder(_entry_plants(entry))
+    except Exception:
+        client.auth.async_shutdown()
+        raise
+    return coordinator
 
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
-    return True
+
+async def async_close_coordinator(coordinator: ShineMonitorDataUpdateCoordinator) -> None:
+    """Close the history and stop the background work of a coordinator."""
+    coordinator.cache.async_shutdown()
+    await coordinator.history.async_close()
+    coordinator.client.auth.async_shutdown()
+
+
+async def async_start_coordinator(
+    hass: HomeAssistant, coordinator: ShineMonitorDataUpdateCoordinator, delay: float = 0
+) -> None:
+    """Open the history, load the analytics and run the first refresh after ``delay``."""
+    if delay:
+        await asyncio.sleep(delay)
+    await coordinator.history.async_open()
+    # NumPy is only imported once the entry is up, and off the event loop.
+    analytics = await hass.async_add_executor_job(
+        importlib.import_module, f"{__name__}.analytics"
+    )
+    coordinator.analytics = analytics.ShineMonitorAnalytics(coordinator.history)
+    await coordinator.async_refresh()
+
+
+def _startup_delay(hass: HomeAssistant) -> float:
+    """Return a random delay spreading the first refreshes of entries at startup."""
+    if hass.is_running:
+        return 0
+    entries = len(hass.config_entries.async_entries(DOMAIN))
+    return random.uniform(0, min(MAX_STARTUP_DELAY, STARTUP_STAGGER * entries))
+
+
+async def _async_update_listener(
+    hass: HomeAssistant, entry: config_entries.ConfigEntry
+) -> None:
+    """Reload the entry when its options change."""
+    await hass.config_entries.async_reload(entry.entry_id)
 
 
 async def async_unload_entry(
@@ -41,5 +162,37 @@ async def async_unload_entry(
     """Unload a config entry."""
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id)
+        coordinator = hass.data[DOMAIN].pop(entry.entry_id)
+        await async_close_coordinator(coordinator)
     return unload_ok
+
+
+async def async_remove_entry(
+    hass: HomeAssistant, entry: config_entries.ConfigEntry
+) -> None:
+    """Remove data stored for a config entry."""
+    await async_remove_stored_token(hass, entry.entry_id)
+    await async_remove_checkpoints(hass, entry.entry_id)
+    await async_remove_snapshot(hass, entry.entry_id)
+    await async_remove_history(hass, entry.entry_id)
+    await async_remove_export_checkpoints(hass, entry.entry_id)
+
+
+def _entry_plants(entry: config_entries.ConfigEntry):
+    """Return the plant names listed by the config flow, keyed by plant id."""
+    if "plants" in entry.data:
+        return entry.data["plants"]
+    if "plant_id" in entry.data:
+        # Single plant entries only store the id and name of their plant.
+        plant_id = str(entry.data["plant_id"])
+        return {plant_id: entry.data.get("plant_name") or plant_id}
+    return None
+
+
+def _entry_plant_ids(entry: config_entries.ConfigEntry):
+    """Return the plants to poll, or None to poll every plant of the account."""
+    if "plant_ids" not in entry.data:
+        return [entry.data["plant_id"]]
+    if entry.data.get("all_plants"):
+        return None
+    return entry.data["plant_ids"]
@@ -0,0 +1,109 @@
+"""Fleet and plant group totals of a Shine Monitor entry."""
+
+import voluptuous as vol
+
+from homeassistant.util import slugify
+
+from .const import ENERGY_FLOWS
+
+AGGREGATE_METRICS = ("current_power", "total_energy", "profit", "co2", *ENERGY_FLOWS)
+FLEET = "fleet"
+RESYNC_UPDATES = 1000
+
+
+def parse_groups(text):
+    """Parse ``Name: plant id, plant id`` lines into ``{name: [plant ids]}``."""
+    groups = {}
+    keys = set()
+    for line in (text or "").splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        name, separator, members = line.partition(":")
+        name = name.strip()
+        plant_ids = [member.strip() for member in members.split(",") if member.strip()]
+        if not separator or not name or not plant_ids:
+            raise vol.Invalid(f"Invalid group line: {line}")
+        # Groups are keyed by slug, so names only differing in case or
+        # punctuation would share their totals and sensors.
+        if slugify(name) == FLEET or group_key(name) in keys:
+            raise vol.Invalid(f"Duplicate group name: {name}")
+        keys.add(group_key(name))
+        groups[name] = plant_ids
+    return groups
+
+
+def format_groups(groups):
+    """Format ``{name: [plant ids]}`` back into the option text."""
+    return "\n".join(f"{name}: {', '.join(plant_ids)}" for name, plant_ids in groups.items())
+
+
+def group_key(name):
+    """Return the key of a user-defined group."""
+    return f"group_{slugify(name)}"
+
+
+class PlantAggregator:
+    """Maintain per-group sums of plant metrics by applying per-plant deltas.
+
+    Every plant belongs to the ``fleet`` group and to the user-defined groups
+    listing it. On each update only plants whose values changed touch the
+    totals, each at a cost proportional to the number of its groups. The
+    totals are recomputed from scratch every ``RESYNC_UPDATES`` updates to
+    drop accumulated floating point error.
+    """
+
+    def __init__(self, groups=None):
+        """Initialize the aggregator with ``{name: [plant ids]}`` groups."""
+        self.names = {FLEET: "Fleet"}
+        self._members = {}
+        for name, plant_ids in (groups or {}).items():
+            key = group_key(name)
+            self.names[key] = name
+            for plant_id in plant_ids:
+                self._members.setdefault(str(plant_id), []).append(key)
+        self._values = {}
+        self._updates = 0
+        self.totals = {}
+        self._reset()
+
+    def _reset(self):
+        """Zero every total and forget the plant values."""
+        self._values = {}
+        self.totals = {key: dict.fromkeys(AGGREGATE_METRICS, 0.0) for key in self.names}
+
+    def _groups(self, plant_id):
+        """Return the groups of a plant."""
+        return [FLEET, *self._members.get(plant_id, ())]
+
+    def update(self, plants):
+        """Apply the changes of ``plants`` and return the rounded totals."""
+        self._updates += 1
+        if self._updates % RESYNC_UPDATES == 0:
+            self._reset()
+
+        for plant_id in set(self._values) - set(plants):
+            self._apply(plant_id, dict.fromkeys(AGGREGATE_METRICS, 0.0))
+            del self._values[plant_id]
+        for plant_id, plant in plants.items():
+            self._apply(
+                plant_id,
+                {metric: float(plant.get(metric) or 0) for metric in AGGREGATE_METRICS},
+            )
+        return {
+            key: {metric: round(total, 3) for metric, total in totals.items()}
+            for key, totals in self.totals.items()
+        }
+
+    def _apply(self, plant_id, values):
+        """Add the difference between ``values`` and the last values of a plant."""
+        previous = self._values.get(plant_id)
+        if previous == values:
+            return
+        groups = self._groups(plant_id)
+        for metric, value in values.items():
+            delta = value - (previous[metric] if previous else 0.0)
+            if delta:
+                for key in groups:
+                    self.totals[key][metric] += delta
+        self._values[plant_id] = values
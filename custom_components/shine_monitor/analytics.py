@@ -0,0 +1,182 @@
+"""Expected yield, performance ratio and anomaly detection for Shine Monitor plants.
+
+The expected output of a plant at a given time of day is the upper envelope
+(``ENVELOPE_PERCENTILE``) of its own 5 minute power history over the last
+``ENVELOPE_DAYS`` days, which approximates its clear-sky production. The
+envelope of every plant is rebuilt from the local history in one executor
+job every ``ENVELOPE_REFRESH``; the per-cycle comparison with the latest
+values is a single vectorized computation over all plants.
+"""
+
+import logging
+import sqlite3
+import time
+import warnings
+from datetime import timedelta
+
+import numpy as np
+
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    STATUS_NO_OUTPUT,
+    STATUS_NORMAL,
+    STATUS_UNDERPERFORMING,
+)
+from .history import RESOLUTIONS
+
+_LOGGER = logging.getLogger(__name__)
+
+SLOT_SECONDS = RESOLUTIONS["5min"]
+SLOTS = 86400 // SLOT_SECONDS
+ENVELOPE_DAYS = 14
+ENVELOPE_PERCENTILE = 90
+ENVELOPE_REFRESH = timedelta(hours=6)
+MIN_HISTORY_DAYS = 3
+ANOMALY_BAND = 0.5
+MIN_EXPECTED_POWER = 0.05
+MIN_EXPECTED_ENERGY = 0.1
+
+
+def _utc_offsets(first_day, days):
+    """Return the local UTC offset in seconds of each UTC day from ``first_day``."""
+    return np.array(
+        [
+            dt_util.as_local(
+                dt_util.utc_from_timestamp((first_day + day) * 86400 + 43200)
+            ).utcoffset().total_seconds()
+            for day in range(days)
+        ],
+        dtype=np.int64,
+    )
+
+
+def build_envelope(conn, plant_ids, end):
+    """Return the ``(plants, SLOTS)`` expected power envelope from the history.
+
+    Slots of plants with fewer than ``MIN_HISTORY_DAYS`` days of history are NaN.
+    """
+    index = {plant_id: position for position, plant_id in enumerate(plant_ids)}
+    start = end - ENVELOPE_DAYS * 86400
+    placeholders = ",".join("?" * len(plant_ids))
+    rows = conn.execute(
+        "SELECT plant_id, start, sum / count FROM rollup "
+        f"WHERE plant_id IN ({placeholders}) AND metric = 'current_power' "
+        "AND resolution = ? AND start >= ? AND start < ?",
+        (*plant_ids, SLOT_SECONDS, start, end),
+    ).fetchall()
+    grid = np.full((len(plant_ids), ENVELOPE_DAYS + 2, SLOTS), np.nan, dtype=np.float32)
+    if not rows:
+        return grid[:, 0, :]
+
+    plants = np.fromiter((index[row[0]] for row in rows), dtype=np.int64, count=len(rows))
+    starts = np.fromiter((row[1] for row in rows), dtype=np.int64, count=len(rows))
+    values = np.fromiter((row[2] for row in rows), dtype=np.float32, count=len(rows))
+
+    first_day = start // 86400
+    offsets = _utc_offsets(first_day, ENVELOPE_DAYS + 2)
+    local = starts + offsets[starts // 86400 - first_day]
+    days = local // 86400 - first_day
+    slots = (local % 86400) // SLOT_SECONDS
+    valid = (days >= 0) & (days < grid.shape[1])
+    grid[plants[valid], days[valid], slots[valid]] = values[valid]
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        history_days = np.sum(np.any(~np.isnan(grid), axis=2), axis=1)
+        envelope = np.nanpercentile(grid, ENVELOPE_PERCENTILE, axis=1)
+    envelope[history_days < MIN_HISTORY_DAYS] = np.nan
+    return envelope.astype(np.float32)
+
+
+class ShineMonitorAnalytics:
+    """Compare the latest plant values with their expected envelope."""
+
+    def __init__(self, history):
+        """Initialize the analytics."""
+        self.history = history
+        self._plant_ids = []
+        self._envelope = None
+        self._built_at = 0
+
+    async def async_update(self, plants):
+        """Add expected values, performance ratio and anomaly status to ``plants``."""
+        plant_ids = sorted(plants)
+        if not plant_ids:
+            return
+        if (
+            self._envelope is None
+            or plant_ids != self._plant_ids
+            or time.time() - self._built_at >= ENVELOPE_REFRESH.total_seconds()
+        ):
+            self._built_at = time.time()
+            try:
+                envelope = await self.history.async_execute(
+                    build_envelope, plant_ids, int(self._built_at)
+                )
+            except sqlite3.Error as err:
+                _LOGGER.warning("Could not build the expected yield envelope: %s", err)
+                return
+            if envelope is None:
+                return
+            self._plant_ids = plant_ids
+            self._envelope = envelope
+
+        for plant_id, result in zip(plant_ids, self._evaluate(plants)):
+            plants[plant_id].update(result)
+
+    def _evaluate(self, plants):
+        """Yield the analytics of every plant, in ``self._plant_ids`` order."""
+        now = dt_util.now()
+        seconds = now.hour * 3600 + now.minute * 60 + now.second
+        slot, fraction = divmod(seconds, SLOT_SECONDS)
+        fraction /= SLOT_SECONDS
+
+        envelope = self._envelope
+        known = ~np.all(np.isnan(envelope), axis=1)
+        filled = np.nan_to_num(envelope)
+        expected_power = filled[:, slot]
+        expected_day = filled.sum(axis=1) * SLOT_SECONDS / 3600
+        expected_so_far = (
+            filled[:, :slot].sum(axis=1) + filled[:, slot] * fraction
+        ) * SLOT_SECONDS / 3600
+
+        actual_power = np.array(
+            [plants[plant_id].get("current_power") or 0 for plant_id in self._plant_ids],
+            dtype=np.float32,
+        )
+        actual_energy = np.array(
+            [plants[plant_id].get("total_energy") or 0 for plant_id in self._plant_ids],
+            dtype=np.float32,
+        )
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = np.where(
+                known & (expected_so_far >= MIN_EXPECTED_ENERGY),
+                actual_energy / expected_so_far * 100,
+                np.nan,
+            )
+        producing = known & (expected_power >= MIN_EXPECTED_POWER)
+        status = np.full(len(self._plant_ids), STATUS_NORMAL, dtype=object)
+        status[producing & (actual_power < expected_power * ANOMALY_BAND)] = (
+            STATUS_UNDERPERFORMING
+        )
+        status[producing & (actual_power <= 0)] = STATUS_NO_OUTPUT
+
+        for index in range(len(self._plant_ids)):
+            if not known[index]:
+                yield {
+                    "expected_power": None,
+                    "expected_energy": None,
+                    "performance_ratio": None,
+                    "anomaly": None,
+                }
+                continue
+            yield {
+                "expected_power": round(float(expected_power[index]), 3),
+                "expected_energy": round(float(expected_day[index]), 2),
+                "performance_ratio": (
+                    None if np.isnan(ratio[index]) else round(float(ratio[index]), 1)
+                ),
+                "anomaly": status[index],
+            }
@@ -0,0 +1,365 @@
+"""Client for the Shine Monitor cloud API."""
+
+import asyncio
+import hashlib
+import logging
+import time
+
+import aiohttp
+
+from .const import API_URL
+from .metrics import ApiMetrics
+from .models import (
+    ENERGY_FLOW_PARAMETERS,
+    Device,
+    DeviceField,
+    EnergyFlow,
+    Envelope,
+    Page,
+    Plant,
+    PlantProfit,
+    ShineMonitorPayloadError,
+    parse_number,
+    parse_samples,
+)
+from .ratelimit import BACKOFF_MAX, MAX_RETRIES, RETRY_STATUSES, parse_retry_after
+
+_LOGGER = logging.getLogger(__name__)
+
+REQUEST_TIMEOUT = 20
+DEFAULT_TOKEN_LIFETIME = 24 * 60 * 60
+DEVICE_PAGE_SIZE = 50
+PLANT_PAGE_SIZE = 100
+PLANT_PAGE_CONCURRENCY = 4
+
+
+class ShineMonitorApiError(Exception):
+    """Error raised when a Shine Monitor request fails."""
+
+    def __init__(self, message, desc=None):
+        """Initialize the error with the API ``desc`` code, if any."""
+        super().__init__(message)
+        self.desc = desc
+
+
+class ShineMonitorAuthError(ShineMonitorApiError):
+    """Error raised when credentials or the session token are rejected."""
+
+
+class ShineMonitorThrottledError(ShineMonitorApiError):
+    """Error raised when the API asks the client to slow down."""
+
+    def __init__(self, message, retry_after=None):
+        """Initialize the error with the delay requested by the server, if any."""
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _sha1(value):
+    return hashlib.sha1(value.encode("utf-8")).hexdigest()
+
+
+def _salt():
+    return str(int(time.time() * 1000))
+
+
+class ShineMonitorApiClient:
+    """Sign and send requests to the Shine Monitor API over a single session."""
+
+    def __init__(
+        self,
+        session,
+        username,
+        password,
+        company_key,
+        token=None,
+        secret=None,
+        token_expires_at=0,
+        api_url=API_URL,
+        scheduler=None,
+    ):
+        """Initialize the client.
+
+        When ``auth`` is set to a ``ShineMonitorAuthManager``, requests make
+        sure a valid token is available and retry once after ERR_NO_AUTH.
+        When a ``RequestScheduler`` is given, requests are paced by it and
+        throttled requests are retried with backoff.
+        """
+        self.session = session
+        self.scheduler = scheduler
+        self.api_url = api_url
+        self.username = username
+        self.password = password
+        self.company_key = company_key
+        self.token = token
+        self.secret = secret
+        self.token_issued_at = 0
+        self.token_expires_at = token_expires_at
+        self.auth = None
+        self.metrics = ApiMetrics()
+
+    async def async_authenticate(self):
+        """Authenticate and store the new token and secret."""
+        auth_action = f"&action=auth&usr={self.username}&company-key={self.company_key}"
+
+        def _auth_url():
+            salt = _salt()
+            auth_sign = _sha1(salt + _sha1(self.password) + auth_action)
+            return f"{self.api_url}?sign={auth_sign}&salt={salt}{auth_action}"
+
+        try:
+            dat = await self._async_get(_auth_url, "auth")
+        except ShineMonitorAuthError:
+            raise
+        except ShineMonitorApiError as err:
+            if err.desc is None:
+                raise
+            raise ShineMonitorAuthError(
+                f"Authentication failed: {err.desc}", err.desc
+            ) from err
+
+        self.token = dat["token"]
+        self.secret = dat["secret"]
+        self.token_issued_at = time.time()
+        self.token_expires_at = self.token_issued_at + int(
+            dat.get("expire") or DEFAULT_TOKEN_LIFETIME
+        )
+        return dat
+
+    async def async_request(self, action, params=None):
+        """Send a signed request for ``action`` and return its ``dat`` payload."""
+        if self.auth is None:
+            return await self._async_signed_get(action, params)
+
+        await self.auth.async_ensure_token()
+        token = self.token
+        try:
+            return await self._async_signed_get(action, params)
+        except ShineMonitorAuthError:
+            await self.auth.async_refresh(stale_token=token)
+        return await self._async_signed_get(action, params)
+
+    async def _async_signed_get(self, action, params):
+        """Sign ``action`` with the current token and send it."""
+        data_action = f"&action={action}" + "".join(
+            f"&{key}={value}" for key, value in (params or {}).items()
+        )
+
+        def _data_url():
+            salt = _salt()
+            data_sign = _sha1(salt + self.secret + self.token + data_action)
+            return f"{self.api_url}?sign={data_sign}&token={self.token}&salt={salt}{data_action}"
+
+        return await self._async_get(_data_url, action)
+
+    async def _async_get(self, build_url, action):
+        """Send a paced GET request, retrying throttled attempts with backoff.
+
+        ``build_url`` is called for every attempt so each one is freshly salted.
+        A ``Retry-After`` longer than ``BACKOFF_MAX`` is not waited for: the
+        error is raised and the next refresh tries again.
+        """
+        attempt = 0
+        while True:
+            if self.scheduler is not None:
+                await self.scheduler.async_acquire()
+            try:
+                return await self._async_get_once(build_url(), action)
+            except ShineMonitorThrottledError as err:
+                if self.scheduler is None:
+                    raise
+                self.scheduler.record_throttled()
+                if attempt >= MAX_RETRIES:
+                    raise
+                if err.retry_after is not None and err.retry_after > BACKOFF_MAX:
+                    self.scheduler.pause(err.retry_after)
+                    raise
+                self.metrics.record_retry(action)
+                delay = self.scheduler.backoff(attempt, err.retry_after)
+                _LOGGER.debug("Request throttled, retrying in %.1fs: %s", delay, err)
+                attempt += 1
+
+    async def _async_get_once(self, url, action):
+        """Perform a GET request, record its metrics and unwrap the API envelope."""
+        started = time.monotonic()
+        result = "CLIENT_ERROR"
+        size = 0
+        try:
+            async with self.session.get(
+                url, timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+            ) as response:
+                result = f"HTTP_{response.status}"
+                if response.status in RETRY_STATUSES:
+                    raise ShineMonitorThrottledError(
+                        f"Request failed with status code {response.status}",
+                        parse_retry_after(response.headers.get("Retry-After")),
+                    )
+                if response.status != 200:
+                    raise ShineMonitorApiError(
+                        f"Request failed with status code {response.status}"
+                    )
+                body = await response.read()
+                size = len(body)
+                envelope = Envelope.from_body(body)
+                result = envelope.result
+        except asyncio.TimeoutError as err:
+            result = "TIMEOUT"
+            raise ShineMonitorApiError(
+                f"Request timed out after {REQUEST_TIMEOUT} seconds"
+            ) from err
+        except aiohttp.ClientError as err:
+            raise ShineMonitorApiError(f"Error communicating with API: {err}") from err
+        except ValueError as err:
+            result = "INVALID_JSON"
+            raise ShineMonitorApiError(f"Invalid response: {err}") from err
+        finally:
+            self.metrics.record_request(action, time.monotonic() - started, result, size)
+
+        if not envelope.ok:
+            desc = envelope.desc
+            if desc == "ERR_NO_AUTH":
+                raise ShineMonitorAuthError(f"Request failed: {desc}", desc)
+            raise ShineMonitorApiError(f"Request failed: {desc}", desc)
+        return envelope.dat
+
+    async def async_get_plants_page(self, page=0, pagesize=PLANT_PAGE_SIZE):
+        """Return one page of the plants owned by the account."""
+        dat = await self.async_request("queryPlants", {"page": page, "pagesize": pagesize})
+        return _parse(lambda: Page.parse(dat, "plant", Plant, "queryPlants"))
+
+    async def async_get_plants(
+        self, pagesize=PLANT_PAGE_SIZE, concurrency=PLANT_PAGE_CONCURRENCY
+    ):
+        """Return the plants owned by the account.
+
+        The first page gives the total; the remaining pages are then fetched
+        ``concurrency`` at a time.
+        """
+        first = await self.async_get_plants_page(0, pagesize)
+        pages = -(-first.total // pagesize)
+        if not first.items or pages <= 1:
+            return first.items
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def _page(page):
+            async with semaphore:
+                return await self.async_get_plants_page(page, pagesize)
+
+        rest = await asyncio.gather(*(_page(page) for page in range(1, pages)))
+        plants = list(first.items)
+        for result in rest:
+            plants.extend(result.items)
+        return plants
+
+    async def async_get_current_power(self, plant_id):
+        """Return the current active output power of a plant in kW."""
+        try:
+            dat = await self.async_request(
+                "queryPlantsActiveOuputPowerCurrent", {"plantid": plant_id}
+            )
+        except ShineMonitorApiError as err:
+            if err.desc == "ERR_NO_RECORD":
+                return 0
+            raise
+        return _parse(
+            lambda: parse_number(dat, "outputPower", "queryPlantsActiveOuputPowerCurrent")
+        )
+
+    async def async_get_energy_day(self, plant_id):
+        """Return the energy produced by a plant today in kWh."""
+        try:
+            dat = await self.async_request("queryPlantEnergyDay", {"plantid": plant_id})
+        except ShineMonitorApiError as err:
+            if err.desc == "ERR_NO_RECORD":
+                return 0
+            raise
+        return _parse(lambda: parse_number(dat, "energy", "queryPlantEnergyDay"))
+
+    async def async_get_profit_day(self, plant_id):
+        """Return today's profit and environmental savings of a plant as ``PlantProfit``."""
+        dat = await self.async_request("queryPlantsProfitOneDay", {"plantid": plant_id})
+        return _parse(lambda: PlantProfit.parse(dat))
+
+    async def async_get_energy_flow(self, plant_id):
+        """Return today's grid, battery and load energy of a plant as ``EnergyFlow``.
+
+        Every flow comes from a single ``queryPlantCurrentData`` request.
+        """
+        try:
+            dat = await self.async_request(
+                "queryPlantCurrentData",
+                {"plantid": plant_id, "par": ",".join(ENERGY_FLOW_PARAMETERS)},
+            )
+        except ShineMonitorApiError as err:
+            if err.desc == "ERR_NO_RECORD":
+                return EnergyFlow()
+            raise
+        return _parse(lambda: EnergyFlow.parse(dat))
+
+    async def async_get_power_one_day(self, plant_id, day):
+        """Return the output power curve of a plant as ``(timestamp, kW)`` pairs."""
+        try:
+            dat = await self.async_request(
+                "queryPlantActiveOuputPowerOneDay",
+                {"plantid": plant_id, "date": day.isoformat()},
+            )
+        except ShineMonitorApiError as err:
+            if err.desc == "ERR_NO_RECORD":
+                return []
+            raise
+        return _parse(
+            lambda: parse_samples(dat, "outputPower", "queryPlantActiveOuputPowerOneDay")
+        )
+
+    async def async_get_energy_month_per_day(self, plant_id, month):
+        """Return the daily energy of a plant for a month as ``(timestamp, kWh)`` pairs."""
+        try:
+            dat = await self.async_request(
+                "queryPlantEnergyMonthPerDay",
+                {"plantid": plant_id, "date": month.strftime("%Y-%m")},
+            )
+        except ShineMonitorApiError as err:
+            if err.desc == "ERR_NO_RECORD":
+                return []
+            raise
+        return _parse(lambda: parse_samples(dat, "perday", "queryPlantEnergyMonthPerDay"))
+
+    async def async_get_devices(self, plant_id, page=0, pagesize=DEVICE_PAGE_SIZE):
+        """Return one page of the devices of a plant as ``(devices, total)``."""
+        try:
+            dat = await self.async_request(
+                "webQueryDeviceEs",
+                {"plantid": plant_id, "page": page, "pagesize": pagesize},
+            )
+        except ShineMonitorApiError as err:
+            if err.desc == "ERR_NO_RECORD":
+                return [], 0
+            raise
+        result = _parse(lambda: Page.parse(dat, "device", Device, "webQueryDeviceEs"))
+        return result.items, result.total
+
+    async def async_get_device_last_data(self, device):
+        """Return the latest telemetry of a device as a list of ``DeviceField``."""
+        try:
+            dat = await self.async_request(
+                "queryDeviceLastData",
+                {
+                    "pn": device["pn"],
+                    "devcode": device["devcode"],
+                    "devaddr": device["devaddr"],
+                    "sn": device["sn"],
+                },
+            )
+        except ShineMonitorApiError as err:
+            if err.desc == "ERR_NO_RECORD":
+                return []
+            raise
+        return _parse(lambda: DeviceField.parse_list(dat))
+
+
+def _parse(getter):
+    """Run ``getter`` and turn malformed payloads into an API error."""
+    try:
+        return getter()
+    except ShineMonitorPayloadError as err:
+        raise ShineMonitorApiError(f"Unexpected response: {err}") from err
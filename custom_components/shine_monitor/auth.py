@@ -0,0 +1,152 @@
+"""Token management for the Shine Monitor API."""
+
+import asyncio
+import logging
+import time
+from datetime import timedelta
+
+from homeassistant.core import callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
+
+from .api import ShineMonitorApiError, ShineMonitorAuthError
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+TOKEN_REFRESH_MARGIN = timedelta(hours=1)
+AUTH_RETRIES = 3
+AUTH_RETRY_DELAY = 5
+FAILED_REFRESH_RETRY = timedelta(minutes=5)
+
+
+class ShineMonitorAuthManager:
+    """Keep the token of a client valid and persisted across restarts.
+
+    The token is refreshed in the background shortly before it expires.
+    Concurrent callers needing a new token share a single auth request.
+    """
+
+    def __init__(self, hass, client, entry_id):
+        """Initialize the auth manager."""
+        self.hass = hass
+        self.client = client
+        self.reauth_count = 0
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.auth")
+        self._lock = asyncio.Lock()
+        self._unsub_refresh = None
+
+    @property
+    def token_valid(self):
+        """Return whether the current token can be used without refreshing."""
+        return (
+            self.client.token is not None
+            and time.time() < self.client.token_expires_at - self._refresh_margin()
+        )
+
+    def _refresh_margin(self):
+        lifetime = self.client.token_expires_at - self.client.token_issued_at
+        return min(TOKEN_REFRESH_MARGIN.total_seconds(), max(lifetime, 0) * 0.2)
+
+    async def async_load(self):
+        """Restore the persisted token and schedule its refresh."""
+        stored = await self._store.async_load()
+        if (
+            stored
+            and stored.get("username") == self.client.username
+            and stored.get("expires_at", 0) > self.client.token_expires_at
+        ):
+            self.client.token = stored["token"]
+            self.client.secret = stored["secret"]
+            self.client.token_issued_at = stored["issued_at"]
+            self.client.token_expires_at = stored["expires_at"]
+        self._async_schedule_refresh()
+
+    @callback
+    def async_shutdown(self):
+        """Cancel the scheduled refresh."""
+        if self._unsub_refresh is not None:
+            self._unsub_refresh()
+            self._unsub_refresh = None
+
+    async def async_ensure_token(self):
+        """Refresh the token if it is missing or about to expire."""
+        if not self.token_valid:
+            await self.async_refresh()
+
+    async def async_refresh(self, stale_token=None):
+        """Obtain a new token unless another caller already did.
+
+        ``stale_token`` is the token a request was rejected with; the refresh
+        is skipped when the client has moved on to a different token since.
+        """
+        async with self._lock:
+            if stale_token is not None:
+                if self.client.token != stale_token:
+                    return
+            elif self.token_valid:
+                return
+            await self._async_authenticate()
+
+    async def _async_authenticate(self):
+        """Authenticate with a bounded number of retries on transport errors."""
+        delay = AUTH_RETRY_DELAY
+        for attempt in range(1, AUTH_RETRIES + 1):
+            try:
+                await self.client.async_authenticate()
+                break
+            except ShineMonitorAuthError:
+                raise
+            except ShineMonitorApiError as err:
+                if attempt == AUTH_RETRIES:
+                    raise
+                _LOGGER.debug(
+                    "Authentication attempt %s failed, retrying in %ss: %s",
+                    attempt,
+                    delay,
+                    err,
+                )
+                await asyncio.sleep(delay)
+                delay *= 2
+
+        self.reauth_count += 1
+        await self._store.async_save(
+            {
+                "username": self.client.username,
+                "token": self.client.token,
+                "secret": self.client.secret,
+                "issued_at": self.client.token_issued_at,
+                "expires_at": self.client.token_expires_at,
+            }
+        )
+        self._async_schedule_refresh()
+
+    @callback
+    def _async_schedule_refresh(self, delay=None):
+        """Schedule the next background refresh."""
+        self.async_shutdown()
+        if delay is None:
+            delay = max(
+                self.client.token_expires_at - self._refresh_margin() - time.time(), 0
+            )
+        self._unsub_refresh = async_call_later(
+            self.hass, delay, self._async_scheduled_refresh
+        )
+
+    async def _async_scheduled_refresh(self, _now):
+        """Refresh the token ahead of its expiry."""
+        self._unsub_refresh = None
+        try:
+            await self.async_refresh()
+        except ShineMonitorApiError as err:
+            _LOGGER.warning("Background token refresh failed: %s", err)
+            self._async_schedule_refresh(FAILED_REFRESH_RETRY.total_seconds())
+            return
+        if self._unsub_refresh is None:
+            self._async_schedule_refresh()
+
+
+async def async_remove_stored_token(hass, entry_id):
+    """Delete the token persisted for a config entry."""
+    await Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.auth").async_remove()
@@ -0,0 +1,211 @@
+"""Import historical production into Home Assistant long-term statistics."""
+
+import asyncio
+import logging
+from datetime import date, timedelta
+
+from homeassistant.const import UnitOfEnergy
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+BATCH_SIZE = 24 * 7
+PLANT_CONCURRENCY = 2
+MAX_SAMPLE_GAP = timedelta(minutes=30)
+
+
+def statistic_id(plant_id):
+    """Return the external statistic id holding the hourly energy of a plant."""
+    return f"{DOMAIN}:plant_{plant_id}_energy"
+
+
+def iter_months(start, end):
+    """Yield the first day of every month between ``start`` and ``end``."""
+    month = start.replace(day=1)
+    while month <= end:
+        yield month
+        month = (month + timedelta(days=32)).replace(day=1)
+
+
+def parse_local_timestamp(value):
+    """Parse a plant timestamp, which the API reports in local time."""
+    parsed = dt_util.parse_datetime(value)
+    if parsed is None:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=dt_util.DEFAULT_TIME_ZONE)
+    return parsed
+
+
+async def async_iter_production_days(client, plant_id, start, end):
+    """Yield ``(day, kWh)`` for every producing day between ``start`` and ``end``."""
+    for month in iter_months(start, end):
+        for timestamp, energy in await client.async_get_energy_month_per_day(
+            plant_id, month
+        ):
+            parsed = parse_local_timestamp(timestamp)
+            if parsed is None or energy <= 0:
+                continue
+            day = parsed.date()
+            if start <= day <= end:
+                yield day, energy
+
+
+def hourly_energy(samples, day_energy):
+    """Integrate a power curve into hourly energy scaled to the day's total.
+
+    ``samples`` are ``(timestamp, kW)`` pairs. Segments longer than
+    ``MAX_SAMPLE_GAP`` are treated as missing data.
+    """
+    hours = {}
+    previous = None
+    for timestamp, power in samples:
+        parsed = parse_local_timestamp(timestamp)
+        if parsed is None:
+            continue
+        if previous is not None:
+            prev_time, prev_power = previous
+            span = parsed - prev_time
+            if timedelta(0) < span <= MAX_SAMPLE_GAP:
+                midpoint = prev_time + span / 2
+                hour = dt_util.as_utc(midpoint).replace(minute=0, second=0, microsecond=0)
+                energy = (prev_power + power) / 2 * span.total_seconds() / 3600
+                hours[hour] = hours.get(hour, 0) + energy
+        previous = (parsed, power)
+
+    integrated = sum(hours.values())
+    if integrated <= 0:
+        return []
+    scale = day_energy / integrated
+    return [(hour, energy * scale) for hour, energy in sorted(hours.items())]
+
+
+async def async_iter_hourly_energy(client, plant_id, days):
+    """Yield ``(day, [(hour, kWh), ...])`` for every day streamed from ``days``."""
+    async for day, day_energy in days:
+        samples = await client.async_get_power_one_day(plant_id, day)
+        yield day, hourly_energy(samples, day_energy)
+
+
+async def async_batched_days(days, size):
+    """Group whole days of hourly rows into batches of at least ``size`` rows."""
+    batch = []
+    last_day = None
+    async for day, rows in days:
+        batch.extend(rows)
+        last_day = day
+        if len(batch) >= size:
+            yield last_day, batch
+            batch = []
+    if batch:
+        yield last_day, batch
+
+
+class ShineMonitorBackfill:
+    """Backfill hourly production statistics for the plants of an entry.
+
+    Progress is checkpointed per plant, so a rerun only fetches the days
+    after the last imported hour.
+    """
+
+    def __init__(self, hass, coordinator, entry_id):
+        """Initialize the backfill engine."""
+        self.hass = hass
+        self.coordinator = coordinator
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.backfill")
+        self._lock = asyncio.Lock()
+
+    async def async_run(self, start, end, plant_ids=None):
+        """Import production between ``start`` and ``end`` (inclusive dates).
+
+        ``plant_ids`` of ``None`` imports every plant of the entry.
+        """
+        if start > end:
+            return
+        if plant_ids is None:
+            plant_ids = list(self.coordinator.plants)
+        async with self._lock:
+            checkpoints = await self._store.async_load() or {}
+            semaphore = asyncio.Semaphore(PLANT_CONCURRENCY)
+
+            async def _run_plant(plant_id):
+                async with semaphore:
+                    await self._async_backfill_plant(
+                        plant_id, start, end, checkpoints
+                    )
+
+            await asyncio.gather(
+                *(_run_plant(plant_id) for plant_id in plant_ids)
+            )
+
+    async def _async_backfill_plant(self, plant_id, start, end, checkpoints):
+        """Import the missing range of one plant batch by batch."""
+        # The recorder is only needed when a backfill runs; importing it here
+        # keeps it off the integration's startup path.
+        from homeassistant.components.recorder.models import (
+            StatisticData,
+            StatisticMetaData,
+        )
+        from homeassistant.components.recorder.statistics import (
+            async_add_external_statistics,
+        )
+
+        checkpoint = checkpoints.get(plant_id)
+        total = 0.0
+        first_day = start.isoformat()
+        if checkpoint is not None and date.fromisoformat(checkpoint["first_day"]) <= start:
+            last_day = date.fromisoformat(checkpoint["last_day"])
+            if last_day >= end:
+                _LOGGER.debug("Plant %s already backfilled up to %s", plant_id, end)
+                return
+            start = last_day + timedelta(days=1)
+            total = checkpoint["sum"]
+            first_day = checkpoint["first_day"]
+
+        metadata = StatisticMetaData(
+            has_mean=False,
+            has_sum=True,
+            name=f"{self.coordinator.plants.get(plant_id, plant_id)} Production",
+            source=DOMAIN,
+            statistic_id=statistic_id(plant_id),
+            unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        )
+        days = async_iter_production_days(self.coordinator.client, plant_id, start, end)
+        hourly = async_iter_hourly_energy(self.coordinator.client, plant_id, days)
+        imported = 0
+        async for last_day, batch in async_batched_days(hourly, BATCH_SIZE):
+            statistics = []
+            for hour, energy in batch:
+                total += energy
+                statistics.append(StatisticData(start=hour, state=energy, sum=total))
+            async_add_external_statistics(self.hass, metadata, statistics)
+            imported += len(statistics)
+            checkpoints[plant_id] = {
+                "first_day": first_day,
+                "last_day": last_day.isoformat(),
+                "sum": total,
+            }
+            await self._store.async_save(checkpoints)
+
+        checkpoints[plant_id] = {
+            "first_day": first_day,
+            "last_day": end.isoformat(),
+            "sum": total,
+        }
+        await self._store.async_save(checkpoints)
+        _LOGGER.info("Backfilled %s hours of production for plant %s", imported, plant_id)
+
+
+async def async_remove_checkpoints(hass, entry_id):
+    """Delete the backfill checkpoints stored for a config entry."""
+    await Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.backfill").async_remove()
+
+
+def parse_range(start, end):
+    """Return the backfill range, defaulting ``end`` to yesterday."""
+    yesterday = dt_util.now().date() - timedelta(days=1)
+    return start, min(end or yesterday, yesterday)
@@ -0,0 +1,99 @@
+"""Response cache for slow-moving Shine Monitor metrics."""
+
+import logging
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from homeassistant.util import dt as dt_util
+
+from .api import ShineMonitorApiError
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_TTLS = {
+    "queryPlantEnergyDay": timedelta(minutes=15),
+    "queryPlantsProfitOneDay": timedelta(minutes=30),
+    "queryPlantCurrentData": timedelta(minutes=15),
+}
+MAX_STALE = timedelta(minutes=30)
+MAX_ENTRIES = 4096
+
+
+class ResponseCache:
+    """Cache parsed responses per action, plant and local day.
+
+    Entries younger than the action's TTL are served directly. Entries past
+    their TTL but within ``max_stale`` are served while a background request
+    revalidates them; ``async_shutdown`` cancels the pending revalidations.
+    Actions without a TTL always hit the network. The least recently used
+    entries are evicted beyond ``max_entries``.
+    """
+
+    def __init__(self, hass, ttls=None, max_stale=MAX_STALE, max_entries=MAX_ENTRIES):
+        """Initialize the cache."""
+        self.hass = hass
+        self.ttls = {
+            action: ttl.total_seconds() for action, ttl in (ttls or DEFAULT_TTLS).items()
+        }
+        self.max_stale = max_stale.total_seconds()
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._revalidating = set()
+        self._tasks = set()
+
+    async def async_get(self, action, plant_id, fetch):
+        """Return the cached value for ``action`` or obtain it with ``fetch``."""
+        ttl = self.ttls.get(action)
+        if not ttl:
+            return await fetch()
+
+        key = (action, plant_id, dt_util.now().date())
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, fetched_at = entry
+            self._entries.move_to_end(key)
+            age = time.monotonic() - fetched_at
+            if age < ttl:
+                self.hits += 1
+                return value
+            if age < ttl + self.max_stale:
+                self.hits += 1
+                if key not in self._revalidating:
+                    self._revalidating.add(key)
+                    task = self.hass.async_create_task(self._async_revalidate(key, fetch))
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+                return value
+
+        self.misses += 1
+        value = await fetch()
+        self._store(key, value)
+        return value
+
+    async def _async_revalidate(self, key, fetch):
+        """Refresh a stale entry in the background."""
+        try:
+            self._store(key, await fetch())
+        except ShineMonitorApiError as err:
+            _LOGGER.debug("Keeping stale %s for plant %s: %s", key[0], key[1], err)
+        finally:
+            self._revalidating.discard(key)
+
+    def _store(self, key, value):
+        """Insert an entry and evict the least recently used ones."""
+        self._entries[key] = (value, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def async_shutdown(self):
+        """Cancel the background revalidations."""
+        for task in self._tasks:
+            task.cancel()
+
+    def clear(self):
+        """Drop every cached entry."""
+        self._entries.clear()
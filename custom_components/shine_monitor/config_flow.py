@@ -1,11 +1,103 @@
+import time
+
 import voluptuous as vol
 from homeassistant import config_entries
 from homeassistant.core import callback
-import hashlib
-import time
-import aiohttp
+from homeassistant.data_entry_flow import AbortFlow
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.selector import (
+    SelectOptionDict,
+    SelectSelector,
+    SelectSelectorConfig,
+    SelectSelectorMode,
+    TextSelector,
+    TextSelectorConfig,
+)
+
+from .aggregates import format_groups, parse_groups
+from .api import ShineMonitorApiClient, ShineMonitorApiError
+from .const import (
+    API_URL,
+    CONF_FAST_LANE_INTERVAL,
+    CONF_GROUPS,
+    CONF_STALE_GRACE_PERIOD,
+    DEFAULT_FAST_LANE_INTERVAL,
+    DEFAULT_STALE_GRACE_PERIOD,
+    DOMAIN,
+    MIN_FAST_LANE_INTERVAL,
+)
+from .ratelimit import async_get_request_scheduler
+
+DATA_ACCOUNTS = f"{DOMAIN}_flow_accounts"
+ACCOUNT_CACHE_TTL = 600
+
+
+async def _async_get_account(hass, username, password, company_key, api_url=API_URL):
+    """Return an authenticated client and the plants of an account.
+
+    Both are cached for ``ACCOUNT_CACHE_TTL`` seconds per account, so going
+    back through the config flow does not authenticate and list the plants
+    again. Expired accounts are dropped on every call, and a flow forgets its
+    account with ``_forget_account`` once it creates its entry.
+    """
+    accounts = hass.data.setdefault(DATA_ACCOUNTS, {})
+    now = time.monotonic()
+    for expired, cached in list(accounts.items()):
+        if now - cached["fetched"] >= ACCOUNT_CACHE_TTL:
+            del accounts[expired]
+    key = (api_url, company_key, username)
+    cached = accounts.get(key)
+    if (
+        cached is not None
+        and cached["password"] == password
+        and cached["client"].token_expires_at > time.time()
+    ):
+        return cached["client"], cached["plants"]
+
+    client = await _async_authenticate(hass, username, password, company_key, api_url)
+    try:
+        plants = await client.async_get_plants()
+    except ShineMonitorApiError as e:
+        raise Exception(f"Error during authentication: {str(e)}")
+    plants.sort(key=lambda plant: (str(plant.name).casefold(), plant.pid))
+    accounts[key] = {
+        "client": client,
+        "plants": plants,
+        "password": password,
+        "fetched": time.monotonic(),
+    }
+    return client, plants
+
+
+async def _async_authenticate(hass, username, password, company_key, api_url=API_URL):
+    """Return a client authenticated with the given credentials."""
+    client = ShineMonitorApiClient(
+        async_get_clientsession(hass),
+        username,
+        password,
+        company_key,
+        api_url=api_url,
+        scheduler=async_get_request_scheduler(hass, username),
+    )
+    try:
+        await client.async_authenticate()
+    except ShineMonitorApiError as e:
+        raise Exception(f"Error during authentication: {str(e)}")
+    return client
 
-from .const import DOMAIN
+
+def _forget_account(hass, username, company_key, api_url=API_URL):
+    """Drop the cached client, plants and password of an account."""
+    hass.data.get(DATA_ACCOUNTS, {}).pop((api_url, company_key, username), None)
+
+
+def _token_data(client):
+    """Return the entry data holding the session token of ``client``."""
+    return {
+        "token": client.token,
+        "secret": client.secret,
+        "token_expires_at": client.token_expires_at,
+    }
 
 
 class ShineMonitorConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
@@ -24,33 +116,44 @@ class ShineMonitorConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
         if user_input is not None:
             try:
-                plants, token, secret = await self._authenticate(
+                api_url = user_input.get("api_url", API_URL)
+                client, plants = await _async_get_account(
+                    self.hass,
                     user_input["username"],
                     user_input["password"],
                     user_input["company_key"],
+                    api_url,
                 )
 
                 self.auth_info = {
                     "username": user_input["username"],
                     "password": user_input["password"],
                     "company_key": user_input["company_key"],
-                    "token": token,
-                    "secret": secret,
+                    **_token_data(client),
+                    "api_url": api_url,
                 }
                 self.plants = plants
 
+                await self.async_set_unique_id(
+                    f"{user_input['company_key']}_{user_input['username']}"
+                )
+                self._abort_if_unique_id_configured()
+
                 return await self.async_step_plant()
 
+            except AbortFlow:
+                raise
             except Exception as e:
                 errors["base"] = str(e)
 
-        data_schema = vol.Schema(
-            {
-                vol.Required("username"): str,
-                vol.Required("password"): str,
-                vol.Required("company_key"): str,
-            }
-        )
+        schema = {
+            vol.Required("username"): str,
+            vol.Required("password"): str,
+            vol.Required("company_key"): str,
+        }
+        if self.show_advanced_options:
+            schema[vol.Optional("api_url", default=API_URL)] = str
+        data_schema = vol.Schema(schema)
 
         return self.async_show_form(
             step_id="user", data_schema=data_schema, errors=errors
@@ -61,30 +164,49 @@ class ShineMonitorConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         errors = {}
 
         if user_input is not None:
-            selected_plant = next(
-                (
-                    plant
-                    for plant in self.plants
-                    if str(plant["pid"]) == user_input["plant"]
-                ),
-                None,
-            )
+            selected_plants = [
+                plant
+                for plant in self.plants
+                if plant.pid in user_input["plants"]
+            ]
 
-            if selected_plant:
+            if selected_plants or user_input["all_plants"]:
+                # The plant names seed the entities until the first refresh.
+                known_plants = (
+                    self.plants if user_input["all_plants"] else selected_plants
+                )
+                _forget_account(
+                    self.hass,
+                    self.auth_info["username"],
+                    self.auth_info["company_key"],
+                    self.auth_info["api_url"],
+                )
                 return self.async_create_entry(
-                    title=f"Shine Monitor - {selected_plant['name']}",
+                    title=f"Shine Monitor - {self.auth_info['username']}",
                     data={
                         **self.auth_info,
-                        "plant_id": selected_plant["pid"],
-                        "plant_name": selected_plant["name"],
+                        "all_plants": user_input["all_plants"],
+                        "plant_ids": [plant.pid for plant in selected_plants],
+                        "plants": {plant.pid: plant.name for plant in known_plants},
                     },
                 )
+            errors["base"] = "no_plants_selected"
 
         plant_schema = vol.Schema(
             {
-                vol.Required("plant"): vol.In(
-                    {str(plant["pid"]): plant["name"] for plant in self.plants}
-                )
+                vol.Required("all_plants", default=True): bool,
+                vol.Optional("plants", default=[]): SelectSelector(
+                    SelectSelectorConfig(
+                        options=[
+                            SelectOptionDict(
+                                value=plant.pid, label=f"{plant.name} ({plant.pid})"
+                            )
+                            for plant in self.plants
+                        ],
+                        multiple=True,
+                        mode=SelectSelectorMode.DROPDOWN,
+                    )
+                ),
             }
         )
 
@@ -92,55 +214,6 @@ class ShineMonitorConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             step_id="plant", data_schema=plant_schema, errors=errors
         )
 
-    async def _authenticate(self, username, password, company_key):
-        """Authenticate and get plants list."""
-        salt = str(int(time.time() * 1000))
-        hashed_password = hashlib.sha1(password.encode("utf-8")).hexdigest()
-        auth_action = f"&action=auth&usr={username}&company-key={company_key}"
-        auth_sign_string = salt + hashed_password + auth_action
-        auth_sign = hashlib.sha1(auth_sign_string.encode("utf-8")).hexdigest()
-        auth_url = f"http://api.shinemonitor.com/public/?sign={auth_sign}&salt={salt}{auth_action}"
-
-        async with aiohttp.ClientSession() as session:
-            try:
-                response = await session.get(auth_url)
-                if response.status == 200:
-                    data = await response.json()
-                    if data.get("err") == 0:
-                        token = data["dat"]["token"]
-                        secret = data["dat"]["secret"]
-
-                        # Fetch plants list
-                        plants = await self._fetch_plants(token, secret)
-                        return plants, token, secret
-                    else:
-                        raise Exception(f"Authentication failed: {data.get('desc')}")
-                else:
-                    raise Exception(
-                        f"Authentication request failed with status {response.status}"
-                    )
-            except Exception as e:
-                raise Exception(f"Error during authentication: {str(e)}")
-
-    async def _fetch_plants(self, token, secret):
-        """Fetch plants list."""
-        salt = str(int(time.time() * 1000))
-        action = "&action=queryPlants"
-        sign_string = salt + secret + token + action
-        sign = hashlib.sha1(sign_string.encode("utf-8")).hexdigest()
-        url = f"http://api.shinemonitor.com/public/?sign={sign}&token={token}&salt={salt}{action}"
-
-        async with aiohttp.ClientSession() as session:
-            response = await session.get(url)
-            if response.status == 200:
-                data = await response.json()
-                if data.get("err") == 0:
-                    return data["dat"]["plant"]
-                else:
-                    raise Exception(f"Failed to fetch plants: {data.get('desc')}")
-            else:
-                raise Exception(f"Plants request failed with status {response.status}")
-
     @staticmethod
     @callback
     def async_get_options_flow(config_entry):
@@ -160,8 +233,46 @@ class ShineMonitorOptionsFlowHandler(config_entries.OptionsFlow):
 
     async def async_step_user(self, user_input=None):
         """Handle a flow initialized by the user."""
+        errors = {}
+
         if user_input is not None:
-            return self.async_create_entry(title="", data=user_input)
+            data = self.config_entry.data
+            credentials = {
+                key: user_input[key] for key in ("username", "password", "company_key")
+            }
+            changed = any(data.get(key) != value for key, value in credentials.items())
+            client = None
+            try:
+                groups = parse_groups(user_input.get(CONF_GROUPS))
+                # Only new credentials need checking, and signing in is enough.
+                if changed:
+                    client = await _async_authenticate(
+                        self.hass,
+                        user_input["username"],
+                        user_input["password"],
+                        user_input["company_key"],
+                        data.get("api_url", API_URL),
+                    )
+            except vol.Invalid as err:
+                errors[CONF_GROUPS] = str(err)
+            except Exception as e:
+                errors["base"] = str(e)
+            else:
+                options = {
+                    CONF_STALE_GRACE_PERIOD: user_input[CONF_STALE_GRACE_PERIOD],
+                    CONF_FAST_LANE_INTERVAL: user_input[CONF_FAST_LANE_INTERVAL],
+                    CONF_GROUPS: groups,
+                }
+                if changed:
+                    # Save the options with the credentials so the update
+                    # listener, and the reload, only runs once; finishing the
+                    # flow with the same options then changes nothing.
+                    self.hass.config_entries.async_update_entry(
+                        self.config_entry,
+                        data={**data, **credentials, **_token_data(client)},
+                        options=options,
+                    )
+                return self.async_create_entry(title="", data=options)
 
         return self.async_show_form(
             step_id="user",
@@ -176,6 +287,28 @@ class ShineMonitorOptionsFlowHandler(config_entries.OptionsFlow):
                     vol.Required(
                         "company_key", default=self.config_entry.data.get("company_key")
                     ): str,
+                    vol.Required(
+                        CONF_STALE_GRACE_PERIOD,
+                        default=self.config_entry.options.get(
+                            CONF_STALE_GRACE_PERIOD, DEFAULT_STALE_GRACE_PERIOD
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                    vol.Required(
+                        CONF_FAST_LANE_INTERVAL,
+                        default=self.config_entry.options.get(
+                            CONF_FAST_LANE_INTERVAL, DEFAULT_FAST_LANE_INTERVAL
+                        ),
+                    ): vol.All(
+                        vol.Coerce(int),
+                        vol.Any(0, vol.Range(min=MIN_FAST_LANE_INTERVAL)),
+                    ),
+                    vol.Optional(
+                        CONF_GROUPS,
+                        default=format_groups(
+                            self.config_entry.options.get(CONF_GROUPS, {})
+                        ),
+                    ): TextSelector(TextSelectorConfig(multiline=True)),
                 }
             ),
+            errors=errors,
         )
@@ -1 +1,20 @@
 DOMAIN = "shine_monitor"
+
+API_URL = "http://api.shinemonitor.com/public/"
+
+CONF_STALE_GRACE_PERIOD = "stale_grace_period"
+DEFAULT_STALE_GRACE_PERIOD = 60
+
+CONF_FAST_LANE_INTERVAL = "fast_lane_interval"
+DEFAULT_FAST_LANE_INTERVAL = 0
+MIN_FAST_LANE_INTERVAL = 10
+
+CONF_GROUPS = "groups"
+
+ENERGY_FLOWS = ("grid_import", "grid_export", "battery_charge", "battery_discharge", "load")
+DAILY_METRICS = ("total_energy", "profit", "coal", "co2", "so2", *ENERGY_FLOWS)
+
+STATUS_NORMAL = "normal"
+STATUS_UNDERPERFORMING = "underperforming"
+STATUS_NO_OUTPUT = "no_output"
+STATUSES = [STATUS_NORMAL, STATUS_UNDERPERFORMING, STATUS_NO_OUTPUT]
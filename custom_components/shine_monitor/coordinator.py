@@ -1,167 +1,449 @@
+import asyncio
 import logging
-import aiohttp
-import hashlib
 import time
 from datetime import timedelta
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 from homeassistant.util import dt as dt_util
-from .const import DOMAIN
+from .api import DEVICE_PAGE_SIZE, ShineMonitorApiError, ShineMonitorAuthError
+from .cache import ResponseCache
+from .const import DAILY_METRICS, DEFAULT_STALE_GRACE_PERIOD, DOMAIN
+from .scheduler import AdaptivePollScheduler
 
 _LOGGER = logging.getLogger(__name__)
 
 UPDATE_INTERVAL = timedelta(minutes=5)
-REAUTH_INTERVAL = timedelta(hours=24)
+PLANT_DISCOVERY_INTERVAL = timedelta(hours=1)
+PLANT_CONCURRENCY = 3
+DEVICE_CONCURRENCY = 4
+DEVICE_BATCH_SIZE = 20
+SNAPSHOT_STORAGE_VERSION = 1
+SNAPSHOT_SAVE_DELAY = 60
+ROLLOVER = "rollover"
+
+
+def hold_stale_daily_counters(data, previous, fetched, today):
+    """Report 0 for daily counters the cloud has not restarted since midnight.
+
+    The cloud keeps reporting yesterday's totals for a while after local
+    midnight. Yesterday's last cloud value of every daily counter is kept
+    under ``data["rollover"]``, and the counter reads 0 while the value
+    fetched for it still equals that value, or was not fetched at all. Once
+    the cloud reports anything else the counter follows it again.
+    """
+    previous = previous or {}
+    held = dict(previous.get(ROLLOVER) or {})
+    if previous.get("date") not in (None, today):
+        held = {}
+        for metric in DAILY_METRICS:
+            final = (previous.get(ROLLOVER) or {}).get(metric, previous.get(metric))
+            if final:
+                held[metric] = final
+    for metric in list(held):
+        if metric in fetched and data.get(metric) != held[metric]:
+            del held[metric]
+        else:
+            data[metric] = 0.0
+    data[ROLLOVER] = held
+    data["date"] = today
+    return data
 
 
 class ShineMonitorDataUpdateCoordinator(DataUpdateCoordinator):
-    """Class to manage fetching Shine Monitor data."""
+    """Class to manage fetching Shine Monitor data for every plant of an account.
+
+    ``plant_ids`` restricts polling to the given plants; when it is ``None``
+    every plant returned by ``queryPlants`` is polled. The resulting data is
+    keyed by plant id under ``data["plants"]``. ``update_interval`` starts at
+    ``UPDATE_INTERVAL`` and is then picked by ``AdaptivePollScheduler``.
+
+    Devices under the polled plants are discovered together with the plants
+    and their latest telemetry is kept under ``data["devices"]``.
+
+    When ``entry_id`` is given, the data is snapshotted to storage after each
+    successful refresh and can be restored on startup with
+    ``async_restore_snapshot``. Data stays usable, flagged as stale, for
+    ``stale_grace_period`` after the last successful refresh.
 
-    def __init__(self, hass, username, password, company_key, plant_id, token, secret):
+    When ``history`` is set to a ``ShineMonitorHistory``, the plant values
+    fetched by every successful refresh are appended to it; last known values
+    kept for failed plants and actions are not. When ``analytics`` is set to
+    a ``ShineMonitorAnalytics``, it adds expected yield, performance ratio and
+    anomaly status to the plant data of every refresh. When ``aggregator`` is
+    set to a ``PlantAggregator``, fleet and group totals are kept under
+    ``data["groups"]``.
+    """
+
+    def __init__(
+        self,
+        hass,
+        client,
+        plant_ids=None,
+        entry_id=None,
+        stale_grace_period=timedelta(minutes=DEFAULT_STALE_GRACE_PERIOD),
+    ):
         """Initialize the data update coordinator."""
-        self.username = username
-        self.password = password
-        self.company_key = company_key
-        self.plant_id = plant_id
-        self.token = token
-        self.secret = secret
-        self.last_reauth = time.time()
+        self.client = client
+        self.plant_ids = (
+            [str(plant_id) for plant_id in plant_ids] if plant_ids is not None else None
+        )
+        self.plants = {}
+        self.devices = {}
+        self.fetched = {}
+        self._flowless_plants = set()
+        self._last_discovery = 0
+        self._semaphore = asyncio.Semaphore(PLANT_CONCURRENCY)
+        self._device_semaphore = asyncio.Semaphore(DEVICE_CONCURRENCY)
+        self._scheduler = AdaptivePollScheduler(hass)
+        self.cache = ResponseCache(hass)
+        self.stale_grace_period = stale_grace_period
+        self.last_success_time = None
+        self.restored = False
+        self.history = None
+        self.analytics = None
+        self.aggregator = None
+        self._snapshot_store = (
+            Store(hass, SNAPSHOT_STORAGE_VERSION, f"{DOMAIN}.{entry_id}.snapshot")
+            if entry_id is not None
+            else None
+        )
         super().__init__(hass, _LOGGER, name=DOMAIN, update_interval=UPDATE_INTERVAL)
 
     async def _async_update_data(self):
-        """Fetch data from the Shine Monitor API."""
-        current_time = time.time()
-        if current_time - self.last_reauth >= REAUTH_INTERVAL.total_seconds():
-            await self._reauthenticate()
-
+        """Fetch data from the Shine Monitor API and record the refresh duration."""
+        started = time.monotonic()
         try:
-            current_power = await self._fetch_current_power()
-            total_power = await self._fetch_total_power()
-            profit_data = await self._fetch_profit_data()
-
-            return {
-                "current_power": current_power,
-                "total_energy": total_power,
-                "profit": profit_data.get("profit", 0),
-                "coal": profit_data.get("coal", 0),
-                "co2": profit_data.get("co2", 0),
-                "so2": profit_data.get("so2", 0),
-                "last_updated": dt_util.now().isoformat(),
+            data = await self._async_fetch_data()
+        finally:
+            self.client.metrics.record_refresh(time.monotonic() - started)
+
+        self.last_success_time = time.time()
+        self.restored = False
+        if self._snapshot_store is not None:
+            self._snapshot_store.async_delay_save(self._snapshot, SNAPSHOT_SAVE_DELAY)
+        if self.history is not None:
+            self.history.async_append(data, self.fetched)
+        if self.analytics is not None:
+            await self.analytics.async_update(data["plants"])
+        if self.aggregator is not None:
+            data["groups"] = self.aggregator.update(data["plants"])
+        return data
+
+    @property
+    def is_stale(self):
+        """Return whether the data is not from a successful refresh of this run."""
+        return self.restored or not self.last_update_success
+
+    @property
+    def data_usable(self):
+        """Return whether entities may keep showing the data."""
+        if self.data is None:
+            return False
+        if self.last_update_success:
+            return True
+        return (
+            self.last_success_time is not None
+            and time.time() - self.last_success_time
+            < self.stale_grace_period.total_seconds()
+        )
+
+    def _snapshot(self):
+        """Return the data to persist."""
+        return {
+            "saved_at": self.last_success_time,
+            "plants": self.plants,
+            "devices": self.devices,
+            "data": self.data,
+        }
+
+    def async_set_placeholder(self, plants=None):
+        """Start with empty data for the known plants until the first refresh.
+
+        ``plants`` maps the plant ids listed by the config flow to their names.
+        """
+        plants = {str(plant_id): name for plant_id, name in (plants or {}).items()}
+        if self.plant_ids is not None:
+            plants = {
+                plant_id: plants.get(plant_id, plant_id) for plant_id in self.plant_ids
             }
-        except UpdateFailed as err:
-            if "ERR_NO_AUTH" in str(err):
-                await self._reauthenticate()
-                return await self._async_update_data()
-            raise err
-
-    async def _reauthenticate(self):
-        """Re-authenticate and update token and secret."""
-        salt = str(int(time.time() * 1000))
-        hashed_password = hashlib.sha1(self.password.encode("utf-8")).hexdigest()
-        auth_action = f"&action=auth&usr={self.username}&company-key={self.company_key}"
-        auth_sign_string = salt + hashed_password + auth_action
-        auth_sign = hashlib.sha1(auth_sign_string.encode("utf-8")).hexdigest()
-        auth_url = f"http://api.shinemonitor.com/public/?sign={auth_sign}&salt={salt}{auth_action}"
-
-        async with aiohttp.ClientSession() as session:
-            try:
-                response = await session.get(auth_url)
-                if response.status == 200:
-                    data = await response.json()
-                    if data.get("err") == 0:
-                        self.token = data["dat"]["token"]
-                        self.secret = data["dat"]["secret"]
-                        self.last_reauth = time.time()
-                    else:
-                        raise UpdateFailed(
-                            f"Re-authentication failed: {data.get('desc')}"
-                        )
-                else:
-                    raise UpdateFailed(
-                        f"Re-authentication request failed with status {response.status}"
+        self.plants = plants
+        self.data = {
+            "plants": {plant_id: {"name": name} for plant_id, name in plants.items()},
+            "devices": {},
+            "last_updated": None,
+        }
+        self.restored = True
+
+    async def async_restore_snapshot(self):
+        """Load the last persisted data, returning whether there was any."""
+        if self._snapshot_store is None:
+            return False
+        snapshot = await self._snapshot_store.async_load()
+        if not snapshot or not snapshot.get("data"):
+            return False
+        if self.plant_ids is not None:
+            snapshot["plants"] = {
+                plant_id: name
+                for plant_id, name in snapshot["plants"].items()
+                if plant_id in self.plant_ids
+            }
+        self.plants = snapshot["plants"]
+        self.devices = snapshot["devices"]
+        self.data = snapshot["data"]
+        self.data["plants"] = {
+            plant_id: plant
+            for plant_id, plant in self.data["plants"].items()
+            if plant_id in self.plants
+        }
+        self.last_success_time = snapshot["saved_at"]
+        self.restored = True
+        return True
+
+    async def _async_fetch_data(self):
+        """Fetch plant and device data."""
+        try:
+            if (
+                not self.plants
+                or time.time() - self._last_discovery
+                >= PLANT_DISCOVERY_INTERVAL.total_seconds()
+            ):
+                await self._async_discover_plants()
+                try:
+                    await self._async_discover_devices()
+                except ShineMonitorApiError as err:
+                    _LOGGER.warning(
+                        "Keeping known devices, device discovery failed: %s", err
                     )
-            except Exception as e:
-                raise UpdateFailed(f"Error during re-authentication: {str(e)}")
-
-    async def _fetch_current_power(self):
-        """Fetch the current active output power from the Shine Monitor API."""
-        data_salt = str(int(time.time() * 1000))
-        data_action = (
-            f"&action=queryPlantsActiveOuputPowerCurrent&plantid={self.plant_id}"
+        except ShineMonitorApiError as err:
+            if not self.plants:
+                raise UpdateFailed(f"Error fetching plants: {err}") from err
+            _LOGGER.warning("Keeping known plants, plant discovery failed: %s", err)
+
+        previous = (self.data or {}).get("plants", {})
+        plant_ids = list(self.plants)
+        results, devices = await asyncio.gather(
+            asyncio.gather(
+                *(
+                    self._async_fetch_plant(plant_id, previous.get(plant_id))
+                    for plant_id in plant_ids
+                ),
+                return_exceptions=True,
+            ),
+            self._async_fetch_devices((self.data or {}).get("devices", {})),
         )
-        data_sign_string = data_salt + self.secret + self.token + data_action
-        data_sign = hashlib.sha1(data_sign_string.encode("utf-8")).hexdigest()
-        data_url = f"http://api.shinemonitor.com/public/?sign={data_sign}&token={self.token}&salt={data_salt}{data_action}"
-
-        async with aiohttp.ClientSession() as session:
-            try:
-                response = await session.get(data_url)
-                if response.status == 200:
-                    data = await response.json()
-                    if data.get("err") == 0:
-                        return float(data["dat"]["outputPower"])
-                    elif data.get("desc") == "ERR_NO_RECORD":
-                        return 0
-                    else:
-                        raise UpdateFailed(f"Data retrieval failed: {data.get('desc')}")
-                else:
-                    raise UpdateFailed(
-                        f"Data request failed with status code {response.status}"
-                    )
-            except Exception as err:
-                raise UpdateFailed(f"Error during data retrieval: {err}")
-
-    async def _fetch_total_power(self):
-        """Fetch the total energy production from the Shine Monitor API."""
-        data_salt = str(int(time.time() * 1000))
-        data_action = f"&action=queryPlantEnergyDay&plantid={self.plant_id}"
-        data_sign_string = data_salt + self.secret + self.token + data_action
-        data_sign = hashlib.sha1(data_sign_string.encode("utf-8")).hexdigest()
-        data_url = f"http://api.shinemonitor.com/public/?sign={data_sign}&token={self.token}&salt={data_salt}{data_action}"
-
-        async with aiohttp.ClientSession() as session:
-            try:
-                response = await session.get(data_url)
-                if response.status == 200:
-                    data = await response.json()
-                    if data.get("err") == 0:
-                        return float(data["dat"]["energy"])
-                    elif data.get("desc") == "ERR_NO_RECORD":
-                        return 0
-                    else:
-                        raise UpdateFailed(f"Data retrieval failed: {data.get('desc')}")
-                else:
-                    raise UpdateFailed(
-                        f"Data request failed with status code {response.status}"
-                    )
-            except Exception as err:
-                raise UpdateFailed(f"Error during data retrieval: {err}")
-
-    async def _fetch_profit_data(self):
-        """Fetch profit and environmental data."""
-        data_salt = str(int(time.time() * 1000))
-        data_action = f"&action=queryPlantsProfitOneDay&plantid={self.plant_id}"
-        data_sign_string = data_salt + self.secret + self.token + data_action
-        data_sign = hashlib.sha1(data_sign_string.encode("utf-8")).hexdigest()
-        data_url = f"http://api.shinemonitor.com/public/?sign={data_sign}&token={self.token}&salt={data_salt}{data_action}"
-
-        async with aiohttp.ClientSession() as session:
-            try:
-                response = await session.get(data_url)
-                if response.status == 200:
-                    data = await response.json()
-                    if data.get("err") == 0:
-                        plant_data = data["dat"]["plant"][0]
-                        return {
-                            "profit": float(plant_data["profit"]),
-                            "coal": float(plant_data["coal"]),
-                            "co2": float(plant_data["co2"]),
-                            "so2": float(plant_data["so2"]),
-                        }
-                    else:
-                        raise UpdateFailed(f"Data retrieval failed: {data.get('desc')}")
-                else:
-                    raise UpdateFailed(
-                        f"Data request failed with status code {response.status}"
+        errors = [result for result in results if isinstance(result, Exception)]
+        for error in errors:
+            if not isinstance(error, ShineMonitorApiError):
+                raise error
+        if errors and len(errors) == len(results):
+            raise UpdateFailed(f"Error during data retrieval: {errors[0]}")
+
+        plants = {}
+        fetched = {}
+        for plant_id, result in zip(plant_ids, results):
+            if isinstance(result, Exception):
+                _LOGGER.warning(
+                    "Keeping last known values for plant %s, update failed: %s",
+                    plant_id,
+                    result,
+                )
+                result = previous.get(plant_id)
+            else:
+                result, fetched[plant_id] = result
+            if result is not None:
+                plants[plant_id] = result
+
+        now = dt_util.now()
+        data = {
+            "plants": plants,
+            "devices": devices,
+            "date": now.date().isoformat(),
+            "last_updated": now.isoformat(),
+        }
+        self.fetched = fetched
+        self.update_interval = self._scheduler.next_interval(data)
+        return data
+
+    async def _async_discover_plants(self):
+        """Refresh the list of plants to poll."""
+        plants = await self.client.async_get_plants()
+        discovered = {plant.pid: plant.name for plant in plants}
+        if self.plant_ids is not None:
+            discovered = {
+                plant_id: discovered.get(plant_id, self.plants.get(plant_id, plant_id))
+                for plant_id in self.plant_ids
+            }
+        self.plants = discovered
+        self._flowless_plants.clear()
+        self._last_discovery = time.time()
+
+    async def _async_fetch_plant(self, plant_id, previous):
+        """Fetch all values of one plant, keeping the last good value of failed actions.
+
+        Returns the plant data and the names of the values actually fetched.
+        """
+        async with self._semaphore:
+            results = await asyncio.gather(
+                self.client.async_get_current_power(plant_id),
+                self.cache.async_get(
+                    "queryPlantEnergyDay",
+                    plant_id,
+                    lambda: self.client.async_get_energy_day(plant_id),
+                ),
+                self.cache.async_get(
+                    "queryPlantsProfitOneDay",
+                    plant_id,
+                    lambda: self.client.async_get_profit_day(plant_id),
+                ),
+                self._async_get_energy_flow(plant_id),
+                return_exceptions=True,
+            )
+        errors = [result for result in results if isinstance(result, Exception)]
+        for error in errors:
+            if not isinstance(error, ShineMonitorApiError):
+                raise error
+        if len(errors) == sum(result is not None for result in results):
+            raise errors[0]
+
+        current_power, total_power, profit_data, energy_flow = results
+        fetched = {}
+        if not isinstance(current_power, Exception):
+            fetched["current_power"] = current_power
+        if not isinstance(total_power, Exception):
+            fetched["total_energy"] = total_power
+        if not isinstance(profit_data, Exception):
+            fetched["profit"] = profit_data.profit
+            fetched["coal"] = profit_data.coal
+            fetched["co2"] = profit_data.co2
+            fetched["so2"] = profit_data.so2
+        if energy_flow is not None and not isinstance(energy_flow, Exception):
+            fetched.update(energy_flow.as_dict())
+
+        data = dict(previous or {})
+        data["name"] = self.plants.get(plant_id, plant_id)
+        data.update(fetched)
+        hold_stale_daily_counters(
+            data, previous, fetched, dt_util.now().date().isoformat()
+        )
+        for error in errors:
+            _LOGGER.warning(
+                "Keeping last known values for plant %s, partial update failed: %s",
+                plant_id,
+                error,
+            )
+        return data, set(fetched)
+
+    async def _async_get_energy_flow(self, plant_id):
+        """Return the energy flows of a plant, or ``None`` if it reports none.
+
+        A plant reporting no flow, or whose datalogger rejects the request, is
+        not asked again until the next plant discovery. Network, throttling
+        and authentication errors are raised as usual.
+        """
+        if plant_id in self._flowless_plants:
+            return None
+        try:
+            energy_flow = await self.cache.async_get(
+                "queryPlantCurrentData",
+                plant_id,
+                lambda: self.client.async_get_energy_flow(plant_id),
+            )
+        except ShineMonitorApiError as err:
+            if err.desc is None or isinstance(err, ShineMonitorAuthError):
+                raise
+            _LOGGER.debug(
+                "Not polling energy flows of plant %s until the next discovery: %s",
+                plant_id,
+                err,
+            )
+            self._flowless_plants.add(plant_id)
+            return None
+        if not energy_flow.as_dict():
+            self._flowless_plants.add(plant_id)
+            return None
+        return energy_flow
+
+    async def _async_discover_devices(self):
+        """Refresh the list of devices under the polled plants.
+
+        Plants are paged through concurrently, as many at a time as plant fetches.
+        """
+        results = await asyncio.gather(
+            *(self._async_discover_plant_devices(plant_id) for plant_id in self.plants),
+            return_exceptions=True,
+        )
+        devices = {}
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+            devices.update(result)
+        self.devices = devices
+
+    async def _async_discover_plant_devices(self, plant_id):
+        """Return the devices under one plant, keyed by device key."""
+        devices = {}
+        page = 0
+        async with self._semaphore:
+            while True:
+                page_devices, total = await self.client.async_get_devices(plant_id, page)
+                for device in page_devices:
+                    devices[device.key] = {
+                        "plant_id": plant_id,
+                        "pn": device.pn,
+                        "sn": device.sn,
+                        "devcode": device.devcode,
+                        "devaddr": device.devaddr,
+                        "name": device.alias or device.sn,
+                    }
+                page += 1
+                if not page_devices or page * DEVICE_PAGE_SIZE >= total:
+                    break
+        return devices
+
+    async def _async_fetch_devices(self, previous):
+        """Fetch the latest telemetry of every device in concurrency-limited batches."""
+        devices = {}
+        keys = list(self.devices)
+        for start in range(0, len(keys), DEVICE_BATCH_SIZE):
+            batch = keys[start : start + DEVICE_BATCH_SIZE]
+            results = await asyncio.gather(
+                *(self._async_fetch_device(key) for key in batch),
+                return_exceptions=True,
+            )
+            for key, result in zip(batch, results):
+                if isinstance(result, ShineMonitorApiError):
+                    _LOGGER.debug(
+                        "Keeping last known values for device %s, update failed: %s",
+                        key,
+                        result,
                     )
-            except Exception as err:
-                raise UpdateFailed(f"Error during data retrieval: {err}")
+                    result = previous.get(key)
+                elif isinstance(result, Exception):
+                    raise result
+                if result is not None:
+                    devices[key] = result
+        return devices
+
+    async def _async_fetch_device(self, key):
+        """Fetch the latest telemetry of one device."""
+        device = self.devices[key]
+        async with self._device_semaphore:
+            items = await self.client.async_get_device_last_data(device)
+
+        fields = {
+            item.id: {"title": item.title, "unit": item.unit, "value": item.value}
+            for item in items
+        }
+        return {
+            "plant_id": device["plant_id"],
+            "name": device["name"],
+            "model": device["devcode"],
+            "fields": fields,
+        }
+
+
+async def async_remove_snapshot(hass, entry_id):
+    """Delete the data snapshot stored for a config entry."""
+    await Store(
+        hass, SNAPSHOT_STORAGE_VERSION, f"{DOMAIN}.{entry_id}.snapshot"
+    ).async_remove()
@@ -0,0 +1,39 @@
+"""Diagnostics support for Shine Monitor."""
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+
+TO_REDACT = {"password", "token", "secret", "username", "company_key"}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict:
+    """Return diagnostics for a config entry."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    client = coordinator.client
+    return {
+        "entry": {
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": async_redact_data(dict(entry.options), TO_REDACT),
+        },
+        "coordinator": {
+            "last_update_success": coordinator.last_update_success,
+            "update_interval": str(coordinator.update_interval),
+            "plants": len(coordinator.plants),
+            "devices": len(coordinator.devices),
+        },
+        "auth": {
+            "token_expires_at": client.token_expires_at,
+            "reauth_count": client.auth.reauth_count if client.auth else None,
+        },
+        "cache": {
+            "hits": coordinator.cache.hits,
+            "misses": coordinator.cache.misses,
+        },
+        "scheduler": dict(client.scheduler.metrics) if client.scheduler else None,
+        "metrics": client.metrics.as_dict(),
+    }
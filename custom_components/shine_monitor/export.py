@@ -0,0 +1,179 @@
+"""Export the production history of Shine Monitor plants to CSV or Parquet files."""
+
+import asyncio
+import csv
+import logging
+import os
+import shutil
+
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .backfill import async_iter_production_days, parse_local_timestamp
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+EXPORT_DIR = f"{DOMAIN}_exports"
+FORMAT_CSV = "csv"
+FORMAT_PARQUET = "parquet"
+FORMATS = (FORMAT_CSV, FORMAT_PARQUET)
+COLUMNS = ("plant_id", "time", "power_kw")
+CHUNK_DAYS = 7
+PLANT_CONCURRENCY = 2
+
+
+def _write_csv(path, size, rows):
+    """Append ``rows`` to a CSV file cut back to ``size`` bytes; return its new size."""
+    if os.path.exists(path):
+        os.truncate(path, size)
+    with open(path, "a", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        if file.tell() == 0:
+            writer.writerow(COLUMNS)
+        writer.writerows(
+            (plant_id, timestamp.isoformat(), power) for plant_id, timestamp, power in rows
+        )
+        return file.tell()
+
+
+def _write_parquet(directory, part, rows):
+    """Write ``rows`` as part file number ``part`` of a Parquet dataset directory."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    plant_ids, timestamps, powers = zip(*rows)
+    table = pa.table(
+        {
+            "plant_id": pa.array(plant_ids, pa.string()),
+            "time": pa.array(timestamps, pa.timestamp("s", tz="UTC")),
+            "power_kw": pa.array(powers, pa.float64()),
+        }
+    )
+    os.makedirs(directory, exist_ok=True)
+    pq.write_table(table, os.path.join(directory, f"part-{part:05d}.parquet"))
+
+
+def _remove(path):
+    """Remove a previous export file or dataset directory."""
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+class ShineMonitorExport:
+    """Export the power curves of the plants of an entry, day chunk by day chunk.
+
+    ``CHUNK_DAYS`` days of a plant are fetched concurrently, then written in
+    one executor job: appended to a CSV file, or as one more part file of a
+    Parquet dataset directory. Progress is checkpointed after every chunk, so
+    memory stays bounded by one chunk and an interrupted export resumes
+    after the last written day when the service is called again.
+    """
+
+    def __init__(self, hass, coordinator, entry_id):
+        """Initialize the exporter."""
+        self.hass = hass
+        self.coordinator = coordinator
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.export")
+        self._lock = asyncio.Lock()
+
+    async def async_run(self, start, end, export_format, plant_ids=None):
+        """Export production between ``start`` and ``end`` and return the paths.
+
+        ``plant_ids`` of ``None`` exports every plant of the entry.
+        """
+        if start > end:
+            return []
+        if plant_ids is None:
+            plant_ids = list(self.coordinator.plants)
+        async with self._lock:
+            checkpoints = await self._store.async_load() or {}
+            directory = self.hass.config.path(EXPORT_DIR)
+            await self.hass.async_add_executor_job(
+                lambda: os.makedirs(directory, exist_ok=True)
+            )
+            semaphore = asyncio.Semaphore(PLANT_CONCURRENCY)
+
+            async def _run_plant(plant_id):
+                async with semaphore:
+                    return await self._async_export_plant(
+                        plant_id, start, end, export_format, directory, checkpoints
+                    )
+
+            return await asyncio.gather(
+                *(_run_plant(plant_id) for plant_id in plant_ids)
+            )
+
+    async def _async_export_plant(
+        self, plant_id, start, end, export_format, directory, checkpoints
+    ):
+        """Export one plant, resuming from its checkpoint."""
+        name = f"{plant_id}_{start.isoformat()}_{end.isoformat()}"
+        path = os.path.join(
+            directory, f"{name}.csv" if export_format == FORMAT_CSV else name
+        )
+        key = f"{name}_{export_format}"
+        checkpoint = checkpoints.get(key)
+        if checkpoint is None:
+            await self.hass.async_add_executor_job(_remove, path)
+            checkpoint = {"last_day": None, "size": 0, "parts": 0}
+        elif checkpoint["last_day"] == end.isoformat():
+            return path
+
+        resume_after = checkpoint["last_day"]
+        chunk = []
+        async for day, _energy in async_iter_production_days(
+            self.coordinator.client, plant_id, start, end
+        ):
+            if resume_after is not None and day.isoformat() <= resume_after:
+                continue
+            chunk.append(day)
+            if len(chunk) >= CHUNK_DAYS:
+                await self._async_write_chunk(
+                    plant_id, chunk, export_format, path, checkpoint
+                )
+                checkpoints[key] = checkpoint
+                await self._store.async_save(checkpoints)
+                chunk = []
+        if chunk:
+            await self._async_write_chunk(
+                plant_id, chunk, export_format, path, checkpoint
+            )
+
+        checkpoint["last_day"] = end.isoformat()
+        checkpoints[key] = checkpoint
+        await self._store.async_save(checkpoints)
+        _LOGGER.info("Exported production of plant %s to %s", plant_id, path)
+        return path
+
+    async def _async_write_chunk(self, plant_id, days, export_format, path, checkpoint):
+        """Fetch the power curves of ``days`` and write them in the executor."""
+        client = self.coordinator.client
+        curves = await asyncio.gather(
+            *(client.async_get_power_one_day(plant_id, day) for day in days)
+        )
+        rows = []
+        for samples in curves:
+            for timestamp, power in samples:
+                parsed = parse_local_timestamp(timestamp)
+                if parsed is not None:
+                    rows.append((plant_id, dt_util.as_utc(parsed), power))
+
+        if rows and export_format == FORMAT_CSV:
+            checkpoint["size"] = await self.hass.async_add_executor_job(
+                _write_csv, path, checkpoint["size"], rows
+            )
+        elif rows:
+            await self.hass.async_add_executor_job(
+                _write_parquet, path, checkpoint["parts"], rows
+            )
+            checkpoint["parts"] += 1
+        checkpoint["last_day"] = days[-1].isoformat()
+
+
+async def async_remove_export_checkpoints(hass, entry_id):
+    """Delete the export checkpoints stored for a config entry."""
+    await Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.export").async_remove()
@@ -0,0 +1,91 @@
+"""Low-latency polling of the current output power of Shine Monitor plants."""
+
+import asyncio
+import logging
+from datetime import timedelta
+
+from homeassistant.core import callback
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import async_track_time_interval
+
+from .api import ShineMonitorApiError
+from .const import DOMAIN
+from .scheduler import SUN_ENTITY_ID
+
+_LOGGER = logging.getLogger(__name__)
+
+FAST_LANE_CONCURRENCY = 4
+
+
+def fast_power_signal(entry_id):
+    """Return the dispatcher signal carrying the fast lane power of an entry."""
+    return f"{DOMAIN}_{entry_id}_fast_power"
+
+
+class ShineMonitorFastLane:
+    """Poll only ``outputPower`` of every plant at a short interval.
+
+    Each tick sends one dispatcher signal with the power of every plant that
+    answered, so a power sensor writes its state at most once per tick and
+    neither the coordinator nor the other sensors are involved. Ticks are
+    skipped while the previous one is still running and while the sun is
+    below the horizon.
+    """
+
+    def __init__(self, hass, coordinator, entry_id, interval):
+        """Initialize the fast lane."""
+        self.hass = hass
+        self.coordinator = coordinator
+        self.signal = fast_power_signal(entry_id)
+        self.interval = timedelta(seconds=interval)
+        self._semaphore = asyncio.Semaphore(FAST_LANE_CONCURRENCY)
+        self._task = None
+        self._unsub = None
+
+    @callback
+    def async_start(self):
+        """Start polling."""
+        self._unsub = async_track_time_interval(self.hass, self._async_tick, self.interval)
+
+    @callback
+    def async_stop(self):
+        """Stop polling."""
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    @callback
+    def _async_tick(self, _now):
+        """Start a poll unless one is still running or it is night."""
+        if self._task is not None and not self._task.done():
+            return
+        sun = self.hass.states.get(SUN_ENTITY_ID)
+        if sun is not None and sun.state == "below_horizon":
+            return
+        self._task = self.hass.async_create_task(self._async_poll())
+
+    async def _async_poll(self):
+        """Fetch the current power of every plant and dispatch the results."""
+        plant_ids = list(self.coordinator.plants)
+        results = await asyncio.gather(
+            *(self._async_fetch(plant_id) for plant_id in plant_ids),
+            return_exceptions=True,
+        )
+        powers = {}
+        for plant_id, result in zip(plant_ids, results):
+            if isinstance(result, ShineMonitorApiError):
+                _LOGGER.debug("Fast lane update of plant %s failed: %s", plant_id, result)
+            elif isinstance(result, Exception):
+                raise result
+            else:
+                powers[plant_id] = result
+        if powers:
+            async_dispatcher_send(self.hass, self.signal, powers)
+
+    async def _async_fetch(self, plant_id):
+        """Fetch the current power of one plant."""
+        async with self._semaphore:
+            return await self.coordinator.client.async_get_current_power(plant_id)
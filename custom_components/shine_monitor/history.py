@@ -0,0 +1,356 @@
+"""Local downsampled production history of the Shine Monitor plants.
+
+Every coordinator sample is appended to a SQLite database in the storage
+directory. Raw samples are kept per plant, metric and UTC day as packed
+arrays, and are rolled up into 5 minute, hourly and daily buckets holding
+count, min, max, sum and the time integral of the metric. Each resolution
+has its own retention, so range queries and aggregations over years of data
+only read a few hundred rows and never touch the cloud API.
+"""
+
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from array import array
+from bisect import bisect_left
+from datetime import timedelta
+
+from homeassistant.core import callback
+from homeassistant.helpers.event import async_track_time_interval
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+METRICS = ("current_power", "total_energy")
+RAW = "raw"
+RESOLUTIONS = {"5min": 300, "hour": 3600, "day": 86400}
+RETENTION = {
+    RAW: timedelta(days=7),
+    "5min": timedelta(days=90),
+    "hour": timedelta(days=2 * 365),
+    "day": None,
+}
+FLUSH_INTERVAL = timedelta(minutes=5)
+MAX_PENDING = 10000
+MAX_INTEGRAL_GAP = 3600
+MAX_POINTS = 2000
+DAY_SECONDS = 86400
+
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS raw (
+        plant_id TEXT NOT NULL,
+        metric TEXT NOT NULL,
+        day INTEGER NOT NULL,
+        ts BLOB NOT NULL,
+        val BLOB NOT NULL,
+        PRIMARY KEY (plant_id, metric, day)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS rollup (
+        plant_id TEXT NOT NULL,
+        metric TEXT NOT NULL,
+        resolution INTEGER NOT NULL,
+        start INTEGER NOT NULL,
+        count INTEGER NOT NULL,
+        min REAL NOT NULL,
+        max REAL NOT NULL,
+        sum REAL NOT NULL,
+        integral REAL NOT NULL,
+        PRIMARY KEY (plant_id, metric, resolution, start)
+    ) WITHOUT ROWID
+    """,
+)
+
+UPSERT_ROLLUP = """
+    INSERT INTO rollup VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (plant_id, metric, resolution, start) DO UPDATE SET
+        count = count + excluded.count,
+        min = MIN(min, excluded.min),
+        max = MAX(max, excluded.max),
+        sum = sum + excluded.sum,
+        integral = integral + excluded.integral
+"""
+
+
+def history_path(hass, entry_id):
+    """Return the database path of a config entry."""
+    return hass.config.path(".storage", f"{DOMAIN}.{entry_id}.history.db")
+
+
+class ShineMonitorHistory:
+    """Append-only time-series store of one config entry.
+
+    Samples are buffered in memory and written in one executor job every
+    ``FLUSH_INTERVAL``. All database access runs in the executor, one job at
+    a time.
+    """
+
+    def __init__(self, hass, entry_id):
+        """Initialize the store."""
+        self.hass = hass
+        self.path = history_path(hass, entry_id)
+        self._conn = None
+        self._pending = []
+        self._last = {}
+        self._purged_day = None
+        self._lock = asyncio.Lock()
+        self._unsub_flush = None
+
+    async def async_open(self):
+        """Open the database and start the periodic flush."""
+        await self.hass.async_add_executor_job(self._open)
+        self._unsub_flush = async_track_time_interval(
+            self.hass, self._async_flush_interval, FLUSH_INTERVAL
+        )
+
+    async def async_close(self):
+        """Flush pending samples and close the database."""
+        if self._unsub_flush is not None:
+            self._unsub_flush()
+            self._unsub_flush = None
+        await self.async_flush()
+        async with self._lock:
+            if self._conn is not None:
+                await self.hass.async_add_executor_job(self._conn.close)
+                self._conn = None
+
+    @callback
+    def async_append(self, data, fetched):
+        """Buffer the plant values a coordinator refresh fetched.
+
+        ``fetched`` maps plant ids to the metrics fetched by the refresh; the
+        last known values carried over for the others are not samples.
+        """
+        now = int(time.time())
+        for plant_id, plant in data.get("plants", {}).items():
+            for metric in fetched.get(plant_id, ()):
+                if metric not in METRICS:
+                    continue
+                value = plant.get(metric)
+                if isinstance(value, (int, float)):
+                    self._pending.append((plant_id, metric, now, float(value)))
+        if len(self._pending) >= MAX_PENDING:
+            self.hass.async_create_task(self.async_flush())
+
+    async def _async_flush_interval(self, _now):
+        """Flush on the periodic timer."""
+        await self.async_flush()
+
+    async def async_flush(self):
+        """Write the buffered samples."""
+        async with self._lock:
+            if self._conn is None or not self._pending:
+                return
+            samples, self._pending = self._pending, []
+            try:
+                await self.hass.async_add_executor_job(self._write, samples)
+            except sqlite3.Error as err:
+                _LOGGER.warning("Dropping %s history samples: %s", len(samples), err)
+
+    async def async_query(self, plant_id, metric, start, end, resolution=None):
+        """Return the samples or buckets of a metric between two timestamps.
+
+        Returns ``None`` while the database is not open.
+        """
+        await self.async_flush()
+        async with self._lock:
+            if self._conn is None:
+                return None
+            return await self.hass.async_add_executor_job(
+                self._query, plant_id, metric, int(start), int(end), resolution
+            )
+
+    async def async_aggregate(self, plant_id, metric, start, end):
+        """Return min, max, mean and integral of a metric between two timestamps.
+
+        Returns ``None`` while the database is not open.
+        """
+        await self.async_flush()
+        async with self._lock:
+            if self._conn is None:
+                return None
+            return await self.hass.async_add_executor_job(
+                self._aggregate, plant_id, metric, int(start), int(end)
+            )
+
+    async def async_execute(self, job, *args):
+        """Run ``job(connection, *args)`` in the executor after flushing."""
+        await self.async_flush()
+        async with self._lock:
+            if self._conn is None:
+                return None
+            return await self.hass.async_add_executor_job(job, self._conn, *args)
+
+    def _open(self):
+        """Connect and create the schema."""
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            for statement in SCHEMA:
+                self._conn.execute(statement)
+
+    def _write(self, samples):
+        """Append raw samples and update the rollups in one transaction."""
+        raw = {}
+        rollups = {}
+        for plant_id, metric, ts, value in samples:
+            arrays = raw.setdefault(
+                (plant_id, metric, ts // DAY_SECONDS), (array("q"), array("d"))
+            )
+            arrays[0].append(ts)
+            arrays[1].append(value)
+
+            integral = 0.0
+            last = self._last.get((plant_id, metric))
+            if last is not None and 0 < ts - last[0] <= MAX_INTEGRAL_GAP:
+                integral = (last[1] + value) / 2 * (ts - last[0]) / 3600
+            self._last[(plant_id, metric)] = (ts, value)
+
+            for seconds in RESOLUTIONS.values():
+                key = (plant_id, metric, seconds, ts - ts % seconds)
+                bucket = rollups.get(key)
+                if bucket is None:
+                    rollups[key] = [1, value, value, value, integral]
+                else:
+                    bucket[0] += 1
+                    bucket[1] = min(bucket[1], value)
+                    bucket[2] = max(bucket[2], value)
+                    bucket[3] += value
+                    bucket[4] += integral
+
+        with self._conn:
+            for (plant_id, metric, day), (ts_array, val_array) in raw.items():
+                row = self._conn.execute(
+                    "SELECT ts, val FROM raw WHERE plant_id = ? AND metric = ? AND day = ?",
+                    (plant_id, metric, day),
+                ).fetchone()
+                if row is not None:
+                    stored_ts, stored_val = array("q"), array("d")
+                    stored_ts.frombytes(row[0])
+                    stored_val.frombytes(row[1])
+                    stored_ts.extend(ts_array)
+                    stored_val.extend(val_array)
+                    ts_array, val_array = stored_ts, stored_val
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO raw VALUES (?, ?, ?, ?, ?)",
+                    (plant_id, metric, day, ts_array.tobytes(), val_array.tobytes()),
+                )
+            self._conn.executemany(
+                UPSERT_ROLLUP, [(*key, *bucket) for key, bucket in rollups.items()]
+            )
+        self._purge()
+
+    def _purge(self):
+        """Apply the retention policies, at most once per day."""
+        today = int(time.time()) // DAY_SECONDS
+        if self._purged_day == today:
+            return
+        self._purged_day = today
+        now = time.time()
+        with self._conn:
+            self._conn.execute(
+                "DELETE FROM raw WHERE day < ?",
+                (int(now - RETENTION[RAW].total_seconds()) // DAY_SECONDS,),
+            )
+            for name, seconds in RESOLUTIONS.items():
+                if RETENTION[name] is None:
+                    continue
+                self._conn.execute(
+                    "DELETE FROM rollup WHERE resolution = ? AND start < ?",
+                    (seconds, int(now - RETENTION[name].total_seconds())),
+                )
+
+    def _pick_resolution(self, start, end):
+        """Return the finest resolution still retained at ``start`` and not too dense."""
+        age = time.time() - start
+        for name, seconds in RESOLUTIONS.items():
+            retention = RETENTION[name]
+            if retention is not None and age > retention.total_seconds():
+                continue
+            if (end - start) / seconds <= MAX_POINTS:
+                return name
+        return "day"
+
+    def _query(self, plant_id, metric, start, end, resolution):
+        """Return raw samples or rollup buckets in ``[start, end)``."""
+        if resolution == RAW:
+            return self._query_raw(plant_id, metric, start, end)
+        if resolution is None:
+            resolution = self._pick_resolution(start, end)
+        seconds = RESOLUTIONS[resolution]
+        rows = self._conn.execute(
+            "SELECT start, count, min, max, sum, integral FROM rollup "
+            "WHERE plant_id = ? AND metric = ? AND resolution = ? "
+            "AND start >= ? AND start < ? ORDER BY start",
+            (plant_id, metric, seconds, start - start % seconds, end),
+        ).fetchall()
+        return [
+            {
+                "start": bucket_start,
+                "count": count,
+                "min": minimum,
+                "max": maximum,
+                "mean": total / count,
+                "integral": integral,
+            }
+            for bucket_start, count, minimum, maximum, total, integral in rows
+        ]
+
+    def _query_raw(self, plant_id, metric, start, end):
+        """Return the raw samples in ``[start, end)``."""
+        points = []
+        rows = self._conn.execute(
+            "SELECT ts, val FROM raw WHERE plant_id = ? AND metric = ? "
+            "AND day >= ? AND day <= ? ORDER BY day",
+            (plant_id, metric, start // DAY_SECONDS, end // DAY_SECONDS),
+        )
+        for ts_bytes, val_bytes in rows:
+            ts_array, val_array = array("q"), array("d")
+            ts_array.frombytes(ts_bytes)
+            val_array.frombytes(val_bytes)
+            first = bisect_left(ts_array, start)
+            last = bisect_left(ts_array, end)
+            points.extend(
+                {"time": ts, "value": value}
+                for ts, value in zip(ts_array[first:last], val_array[first:last])
+            )
+        return points
+
+    def _aggregate(self, plant_id, metric, start, end):
+        """Aggregate the finest retained rollup over ``[start, end)``."""
+        resolution = self._pick_resolution(start, end)
+        seconds = RESOLUTIONS[resolution]
+        count, minimum, maximum, total, integral = self._conn.execute(
+            "SELECT SUM(count), MIN(min), MAX(max), SUM(sum), SUM(integral) FROM rollup "
+            "WHERE plant_id = ? AND metric = ? AND resolution = ? "
+            "AND start >= ? AND start < ?",
+            (plant_id, metric, seconds, start - start % seconds, end),
+        ).fetchone()
+        return {
+            "resolution": resolution,
+            "count": count or 0,
+            "min": minimum,
+            "max": maximum,
+            "mean": total / count if count else None,
+            "integral": integral,
+        }
+
+
+async def async_remove_history(hass, entry_id):
+    """Delete the history database of a config entry."""
+    path = history_path(hass, entry_id)
+
+    def _remove():
+        for suffix in ("", "-wal", "-shm"):
+            try:
+                os.remove(path + suffix)
+            except FileNotFoundError:
+                pass
+
+    await hass.async_add_executor_job(_remove)
@@ -0,0 +1,162 @@
+"""Request instrumentation for the Shine Monitor integration."""
+
+import cProfile
+import time
+from collections import Counter
+
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0)
+REFRESH_HISTORY = 20
+
+
+class ActionMetrics:
+    """Counters and latency histogram of one API action."""
+
+    __slots__ = (
+        "requests",
+        "results",
+        "retries",
+        "bytes",
+        "latency_sum",
+        "latency_max",
+        "buckets",
+    )
+
+    def __init__(self):
+        """Initialize empty counters."""
+        self.requests = 0
+        self.results = Counter()
+        self.retries = 0
+        self.bytes = 0
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def record(self, latency, result, size):
+        """Record one completed request."""
+        self.requests += 1
+        self.results[result] += 1
+        self.bytes += size
+        self.latency_sum += latency
+        self.latency_max = max(self.latency_max, latency)
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if latency <= bound:
+                self.buckets[index] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+
+    @property
+    def errors(self):
+        """Return the number of requests that did not succeed."""
+        return self.requests - self.results["ERR_NONE"]
+
+    def as_dict(self):
+        """Return the metrics as a JSON-serialisable dict."""
+        labels = [f"<={bound}s" for bound in LATENCY_BUCKETS] + [f">{LATENCY_BUCKETS[-1]}s"]
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "results": dict(self.results),
+            "retries": self.retries,
+            "bytes": self.bytes,
+            "latency_mean": self.latency_sum / self.requests if self.requests else None,
+            "latency_max": self.latency_max,
+            "latency_histogram": dict(zip(labels, self.buckets)),
+        }
+
+
+class ApiMetrics:
+    """Per-action request metrics and coordinator refresh timings of one entry."""
+
+    def __init__(self):
+        """Initialize empty metrics."""
+        self.actions = {}
+        self.refresh_durations = []
+        self.started = time.time()
+
+    def _action(self, action):
+        metrics = self.actions.get(action)
+        if metrics is None:
+            metrics = self.actions[action] = ActionMetrics()
+        return metrics
+
+    def record_request(self, action, latency, result, size=0):
+        """Record a completed request of ``action`` with its ``desc`` code."""
+        self._action(action).record(latency, result, size)
+
+    def record_retry(self, action):
+        """Record a retried request of ``action``."""
+        self._action(action).retries += 1
+
+    def record_refresh(self, duration):
+        """Record the duration of a coordinator refresh."""
+        self.refresh_durations.append(duration)
+        del self.refresh_durations[:-REFRESH_HISTORY]
+
+    @property
+    def total_requests(self):
+        """Return the number of requests sent."""
+        return sum(metrics.requests for metrics in self.actions.values())
+
+    @property
+    def total_errors(self):
+        """Return the number of failed requests."""
+        return sum(metrics.errors for metrics in self.actions.values())
+
+    @property
+    def mean_latency(self):
+        """Return the mean request latency in seconds."""
+        requests = self.total_requests
+        if not requests:
+            return None
+        return sum(metrics.latency_sum for metrics in self.actions.values()) / requests
+
+    @property
+    def reauth_count(self):
+        """Return the number of auth requests sent."""
+        metrics = self.actions.get("auth")
+        return metrics.requests if metrics else 0
+
+    @property
+    def last_refresh_duration(self):
+        """Return the duration of the last coordinator refresh in seconds."""
+        return self.refresh_durations[-1] if self.refresh_durations else None
+
+    def as_dict(self):
+        """Return the metrics as a JSON-serialisable dict."""
+        return {
+            "since": self.started,
+            "total_requests": self.total_requests,
+            "total_errors": self.total_errors,
+            "refresh_durations": list(self.refresh_durations),
+            "actions": {action: metrics.as_dict() for action, metrics in self.actions.items()},
+        }
+
+
+class Profiler:
+    """cProfile hook toggled through the ``set_profiling`` service."""
+
+    def __init__(self):
+        """Initialize the profiler."""
+        self._profile = None
+        self.started = None
+
+    @property
+    def running(self):
+        """Return whether profiling is active."""
+        return self._profile is not None
+
+    def start(self):
+        """Start profiling the event loop thread."""
+        if self._profile is None:
+            self._profile = cProfile.Profile()
+            self.started = time.time()
+            self._profile.enable()
+
+    def stop(self):
+        """Stop profiling and return the profile, or None if it was not running."""
+        profile, self._profile = self._profile, None
+        if profile is not None:
+            profile.disable()
+            profile.create_stats()
+        return profile
@@ -0,0 +1,278 @@
+"""Decoding and result models of the Shine Monitor API actions.
+
+Only the fields the integration uses are validated and kept; everything
+else in a payload is dropped as soon as the result object is built.
+"""
+
+import json
+
+from homeassistant.util import slugify
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson ships with Home Assistant
+    orjson = None
+
+
+class ShineMonitorPayloadError(ValueError):
+    """Error raised when a payload lacks a field or has a malformed value."""
+
+
+def loads(body):
+    """Decode a response body, with orjson when it is available."""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def _field(payload, key, action):
+    """Return ``payload[key]``, raising a payload error when it is missing."""
+    try:
+        value = payload[key]
+    except (KeyError, TypeError) as err:
+        raise ShineMonitorPayloadError(f"{action}: missing field {key!r}") from err
+    if value is None:
+        raise ShineMonitorPayloadError(f"{action}: empty field {key!r}")
+    return value
+
+
+def _float(payload, key, action):
+    """Return ``payload[key]`` as a float."""
+    value = _field(payload, key, action)
+    try:
+        return float(value)
+    except (TypeError, ValueError) as err:
+        raise ShineMonitorPayloadError(
+            f"{action}: field {key!r} is not a number: {value!r}"
+        ) from err
+
+
+def _list(payload, key, action):
+    """Return ``payload[key]`` as a list."""
+    value = _field(payload, key, action)
+    if not isinstance(value, list):
+        raise ShineMonitorPayloadError(f"{action}: field {key!r} is not a list")
+    return value
+
+
+class Envelope:
+    """The ``err``/``desc``/``dat`` envelope wrapping every response."""
+
+    __slots__ = ("err", "desc", "dat")
+
+    def __init__(self, err, desc, dat):
+        """Initialize the envelope."""
+        self.err = err
+        self.desc = desc
+        self.dat = dat
+
+    @classmethod
+    def from_body(cls, body):
+        """Decode a response body."""
+        data = loads(body)
+        if not isinstance(data, dict):
+            raise ShineMonitorPayloadError("Response is not a JSON object")
+        return cls(data.get("err"), data.get("desc"), data.get("dat"))
+
+    @property
+    def ok(self):
+        """Return whether the request succeeded."""
+        return self.err == 0
+
+    @property
+    def result(self):
+        """Return the result code recorded in the request metrics."""
+        return self.desc or ("ERR_NONE" if self.ok else "ERR")
+
+
+class Page:
+    """One page of a paged list action."""
+
+    __slots__ = ("items", "total")
+
+    def __init__(self, items, total):
+        """Initialize the page."""
+        self.items = items
+        self.total = total
+
+    @classmethod
+    def parse(cls, dat, key, item_type, action):
+        """Parse the ``key`` list of ``dat`` into ``item_type`` objects."""
+        items = [item_type.parse(item, action) for item in _list(dat, key, action)]
+        try:
+            total = int(dat.get("total", len(items)))
+        except (TypeError, ValueError) as err:
+            raise ShineMonitorPayloadError(f"{action}: malformed total") from err
+        return cls(items, total)
+
+
+class Plant:
+    """A plant of the account."""
+
+    __slots__ = ("pid", "name")
+
+    def __init__(self, pid, name):
+        """Initialize the plant."""
+        self.pid = pid
+        self.name = name
+
+    @classmethod
+    def parse(cls, item, action="queryPlants"):
+        """Parse a ``queryPlants`` item."""
+        pid = str(_field(item, "pid", action))
+        return cls(pid, item.get("name") or pid)
+
+
+class PlantProfit:
+    """Today's profit and environmental savings of a plant."""
+
+    __slots__ = ("profit", "coal", "co2", "so2")
+
+    def __init__(self, profit, coal, co2, so2):
+        """Initialize the result."""
+        self.profit = profit
+        self.coal = coal
+        self.co2 = co2
+        self.so2 = so2
+
+    @classmethod
+    def parse(cls, dat, action="queryPlantsProfitOneDay"):
+        """Parse a ``queryPlantsProfitOneDay`` payload."""
+        plants = _list(dat, "plant", action)
+        if not plants:
+            raise ShineMonitorPayloadError(f"{action}: no plant in response")
+        plant = plants[0]
+        return cls(
+            _float(plant, "profit", action),
+            _float(plant, "coal", action),
+            _float(plant, "co2", action),
+            _float(plant, "so2", action),
+        )
+
+
+class Device:
+    """A datalogger or inverter of a plant."""
+
+    __slots__ = ("pn", "sn", "devcode", "devaddr", "alias")
+
+    def __init__(self, pn, sn, devcode, devaddr, alias=None):
+        """Initialize the device."""
+        self.pn = pn
+        self.sn = sn
+        self.devcode = devcode
+        self.devaddr = devaddr
+        self.alias = alias
+
+    @classmethod
+    def parse(cls, item, action="webQueryDeviceEs"):
+        """Parse a ``webQueryDeviceEs`` item."""
+        return cls(
+            str(_field(item, "pn", action)),
+            str(_field(item, "sn", action)),
+            _field(item, "devcode", action),
+            _field(item, "devaddr", action),
+            item.get("alias"),
+        )
+
+    @property
+    def key(self):
+        """Return the key identifying the device across plants."""
+        return f"{self.pn}_{self.sn}"
+
+
+class DeviceField:
+    """One telemetry field of ``queryDeviceLastData``."""
+
+    __slots__ = ("id", "title", "unit", "value")
+
+    def __init__(self, id, title, unit, value):
+        """Initialize the field."""
+        self.id = id
+        self.title = title
+        self.unit = unit
+        self.value = value
+
+    @classmethod
+    def parse_list(cls, dat, action="queryDeviceLastData"):
+        """Parse the field list, skipping items without an id or title."""
+        if not isinstance(dat, list):
+            raise ShineMonitorPayloadError(f"{action}: response is not a list")
+        fields = []
+        for item in dat:
+            if not isinstance(item, dict):
+                continue
+            title = item.get("title")
+            field = item.get("id") or slugify(title or "")
+            if not field:
+                continue
+            value = item.get("val")
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                pass
+            fields.append(cls(field, title or field, item.get("unit"), value))
+        return fields
+
+
+ENERGY_FLOW_PARAMETERS = {
+    "ENERGY_BUY_TODAY": "grid_import",
+    "ENERGY_SELL_TODAY": "grid_export",
+    "ENERGY_CHARGE_TODAY": "battery_charge",
+    "ENERGY_DISCHARGE_TODAY": "battery_discharge",
+    "ENERGY_LOAD_TODAY": "load",
+}
+ENERGY_UNITS = {"wh": 0.001, "kwh": 1.0, "mwh": 1000.0, "gwh": 1000000.0}
+
+
+class EnergyFlow:
+    """Today's grid, battery and load energy of a plant in kWh.
+
+    Flows the plant does not report, or reports in an unknown unit, are
+    ``None``.
+    """
+
+    __slots__ = tuple(ENERGY_FLOW_PARAMETERS.values())
+
+    def __init__(self, **values):
+        """Initialize the flows."""
+        for metric in self.__slots__:
+            setattr(self, metric, values.get(metric))
+
+    @classmethod
+    def parse(cls, dat, action="queryPlantCurrentData"):
+        """Parse the ``[{"key", "val", "unit"}]`` parameter list, converting to kWh."""
+        if not isinstance(dat, list):
+            raise ShineMonitorPayloadError(f"{action}: response is not a list")
+        values = {}
+        for item in dat:
+            if not isinstance(item, dict):
+                continue
+            metric = ENERGY_FLOW_PARAMETERS.get(item.get("key"))
+            if metric is None or item.get("val") in (None, ""):
+                continue
+            scale = ENERGY_UNITS.get(str(item.get("unit") or "kWh").strip().lower())
+            if scale is None:
+                continue
+            values[metric] = _float(item, "val", action) * scale
+        return cls(**values)
+
+    def as_dict(self):
+        """Return the reported flows."""
+        return {
+            metric: getattr(self, metric)
+            for metric in self.__slots__
+            if getattr(self, metric) is not None
+        }
+
+
+def parse_number(dat, key, action):
+    """Parse the single numeric ``key`` field of a payload."""
+    return _float(dat, key, action)
+
+
+def parse_samples(dat, key, action):
+    """Parse a ``[{"ts": ..., "val": ...}]`` series into ``(timestamp, value)`` pairs."""
+    return [
+        (_field(point, "ts", action), _float(point, "val", action))
+        for point in _list(dat, key, action)
+    ]
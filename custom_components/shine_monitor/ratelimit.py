@@ -0,0 +1,112 @@
+"""Per-account request pacing for the Shine Monitor API."""
+
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+
+DATA_SCHEDULERS = f"{DOMAIN}_request_schedulers"
+
+REQUEST_RATE = 5.0
+REQUEST_BURST = 20
+MAX_RETRIES = 3
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class RequestScheduler:
+    """Token bucket shared by every client of one account.
+
+    Requests wait for a token before being sent. A throttling response pauses
+    the whole bucket, honouring ``Retry-After`` when the server sends one, but
+    never for more than ``BACKOFF_MAX``.
+    """
+
+    def __init__(self, rate=REQUEST_RATE, burst=REQUEST_BURST):
+        """Initialize the scheduler."""
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+        self.metrics = {
+            "requests": 0,
+            "queued": 0,
+            "queued_total": 0,
+            "throttled": 0,
+            "retried": 0,
+        }
+
+    async def async_acquire(self):
+        """Wait until a request may be sent."""
+        self.metrics["queued"] += 1
+        try:
+            async with self._lock:
+                while True:
+                    now = time.monotonic()
+                    self._tokens = min(
+                        self.burst, self._tokens + (now - self._updated) * self.rate
+                    )
+                    self._updated = now
+                    wait = max(self._paused_until - now, 0)
+                    if not wait and self._tokens >= 1:
+                        self._tokens -= 1
+                        break
+                    if not wait:
+                        wait = (1 - self._tokens) / self.rate
+                    self.metrics["queued_total"] += 1
+                    await asyncio.sleep(wait)
+        finally:
+            self.metrics["queued"] -= 1
+        self.metrics["requests"] += 1
+
+    def backoff(self, attempt, retry_after=None):
+        """Return the delay before retry ``attempt`` and pause the bucket for it."""
+        if retry_after is not None:
+            delay = min(retry_after, BACKOFF_MAX)
+        else:
+            delay = min(BACKOFF_MAX, BACKOFF_BASE * 2**attempt)
+            delay += random.uniform(0, delay / 2)
+        self.metrics["retried"] += 1
+        return self.pause(delay)
+
+    def pause(self, delay):
+        """Hold every request for ``delay`` seconds, at most ``BACKOFF_MAX``."""
+        delay = min(delay, BACKOFF_MAX)
+        self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        return delay
+
+    def record_throttled(self):
+        """Count a throttling response."""
+        self.metrics["throttled"] += 1
+
+
+def parse_retry_after(value):
+    """Return the delay in seconds described by a ``Retry-After`` header."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=dt_util.UTC)
+    return max((retry_at - dt_util.utcnow()).total_seconds(), 0.0)
+
+
+def async_get_request_scheduler(hass, username):
+    """Return the scheduler shared by every config entry of ``username``."""
+    schedulers = hass.data.setdefault(DATA_SCHEDULERS, {})
+    if username not in schedulers:
+        schedulers[username] = RequestScheduler()
+    return schedulers[username]
@@ -0,0 +1,83 @@
+"""Adaptive polling interval for the Shine Monitor coordinator."""
+
+import random
+from datetime import timedelta
+
+from homeassistant.util import dt as dt_util
+
+PEAK_INTERVAL = timedelta(minutes=1)
+DAY_INTERVAL = timedelta(minutes=5)
+NIGHT_INTERVAL = timedelta(hours=1)
+MAX_BACKOFF_INTERVAL = timedelta(minutes=30)
+PEAK_ELEVATION = 25
+NIGHT_ELEVATION = -3
+NIGHT_ZERO_CYCLES = 3
+JITTER = 0.1
+
+SUN_ENTITY_ID = "sun.sun"
+
+
+class AdaptivePollScheduler:
+    """Pick the next update interval from the solar day and data changes.
+
+    Polling speeds up while the sun is high, drops to hourly at night and
+    backs off exponentially while the returned values stay the same. When
+    the sun integration is not available, night is inferred from a run of
+    cycles in which every plant reports zero output. Intervals are jittered
+    so entries of the same account do not poll in lockstep.
+    """
+
+    def __init__(self, hass):
+        """Initialize the scheduler."""
+        self.hass = hass
+        self._fingerprint = None
+        self._unchanged_cycles = 0
+        self._zero_cycles = 0
+
+    def next_interval(self, data):
+        """Return the interval to wait before the next refresh."""
+        return self._base_interval(data) * random.uniform(1 - JITTER, 1 + JITTER)
+
+    def _base_interval(self, data):
+        """Return the unjittered interval for ``data``."""
+        plants = data.get("plants", {})
+        fingerprint = tuple(
+            (plant_id, plant.get("current_power"), plant.get("total_energy"))
+            for plant_id, plant in sorted(plants.items())
+        )
+        if fingerprint == self._fingerprint:
+            self._unchanged_cycles += 1
+        else:
+            self._unchanged_cycles = 0
+        self._fingerprint = fingerprint
+
+        if plants and all(not plant.get("current_power") for plant in plants.values()):
+            self._zero_cycles += 1
+        else:
+            self._zero_cycles = 0
+
+        sun = self.hass.states.get(SUN_ENTITY_ID)
+        elevation = sun.attributes.get("elevation") if sun is not None else None
+
+        if elevation is None:
+            if self._zero_cycles >= NIGHT_ZERO_CYCLES:
+                return NIGHT_INTERVAL
+            base = DAY_INTERVAL
+        elif elevation <= NIGHT_ELEVATION:
+            return self._night_interval(sun)
+        elif elevation >= PEAK_ELEVATION:
+            base = PEAK_INTERVAL
+        else:
+            base = DAY_INTERVAL
+
+        backoff = base * 2 ** min(self._unchanged_cycles, 8)
+        return max(base, min(backoff, MAX_BACKOFF_INTERVAL))
+
+    @staticmethod
+    def _night_interval(sun):
+        """Sleep until shortly after sunrise, at most ``NIGHT_INTERVAL``."""
+        next_rising = dt_util.parse_datetime(str(sun.attributes.get("next_rising")))
+        if next_rising is None:
+            return NIGHT_INTERVAL
+        until_sunrise = next_rising - dt_util.utcnow()
+        return max(DAY_INTERVAL, min(until_sunrise, NIGHT_INTERVAL))
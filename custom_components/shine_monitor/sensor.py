@@ -1,166 +1,629 @@
 import logging
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import date
+from typing import Any
+
 from homeassistant.components.sensor import (
     SensorEntity,
+    SensorEntityDescription,
     SensorDeviceClass,
     SensorStateClass,
 )
 from homeassistant.const import (
+    PERCENTAGE,
+    EntityCategory,
+    UnitOfElectricCurrent,
+    UnitOfElectricPotential,
     UnitOfEnergy,
+    UnitOfFrequency,
     UnitOfPower,
     UnitOfMass,
+    UnitOfTemperature,
+    UnitOfTime,
 )
+from homeassistant.core import callback
+from homeassistant.helpers.device_registry import DeviceEntryType, DeviceInfo
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
-from .const import DOMAIN
 from homeassistant.util import dt as dt_util
+from .aggregates import FLEET
+from .const import DOMAIN, STATUSES
+from .fastlane import fast_power_signal
 
 _LOGGER = logging.getLogger(__name__)
 
 
+@dataclass(frozen=True, kw_only=True)
+class ShineMonitorSensorEntityDescription(SensorEntityDescription):
+    """Describes a Shine Monitor plant sensor."""
+
+    value_fn: Callable[[dict], Any]
+    daily: bool = False
+
+
+PLANT_SENSORS = (
+    ShineMonitorSensorEntityDescription(
+        key="current_power",
+        name="Current Solar Production",
+        device_class=SensorDeviceClass.POWER,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfPower.KILO_WATT,
+        value_fn=lambda plant: plant.get("current_power"),
+    ),
+    ShineMonitorSensorEntityDescription(
+        key="total_energy",
+        name="Total Solar Production",
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL,
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        value_fn=lambda plant: plant.get("total_energy"),
+        daily=True,
+    ),
+    ShineMonitorSensorEntityDescription(
+        key="profit",
+        name="Solar Profit",
+        device_class=SensorDeviceClass.MONETARY,
+        state_class=SensorStateClass.TOTAL,
+        native_unit_of_measurement="₹",
+        value_fn=lambda plant: plant.get("profit"),
+        daily=True,
+    ),
+    ShineMonitorSensorEntityDescription(
+        key="coal",
+        name="Coal Saving",
+        state_class=SensorStateClass.TOTAL,
+        native_unit_of_measurement=UnitOfMass.KILOGRAMS,
+        value_fn=lambda plant: plant.get("coal"),
+        daily=True,
+    ),
+    ShineMonitorSensorEntityDescription(
+        key="co2",
+        name="CO2 Reduction",
+        state_class=SensorStateClass.TOTAL,
+        native_unit_of_measurement=UnitOfMass.KILOGRAMS,
+        value_fn=lambda plant: plant.get("co2"),
+        daily=True,
+    ),
+    ShineMonitorSensorEntityDescription(
+        key="so2",
+        name="SO2 Reduction",
+        state_class=SensorStateClass.TOTAL,
+        native_unit_of_measurement=UnitOfMass.KILOGRAMS,
+        value_fn=lambda plant: plant.get("so2"),
+        daily=True,
+    ),
+    ShineMonitorSensorEntityDescription(
+        key="expected_power",
+        name="Expected Solar Production",
+        device_class=SensorDeviceClass.POWER,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfPower.KILO_WATT,
+        value_fn=lambda plant: plant.get("expected_power"),
+    ),
+    ShineMonitorSensorEntityDescription(
+        key="expected_energy",
+        name="Expected Daily Yield",
+        device_class=SensorDeviceClass.ENERGY,
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        value_fn=lambda plant: plant.get("expected_energy"),
+    ),
+    ShineMonitorSensorEntityDescription(
+        key="performance_ratio",
+        name="Performance Ratio",
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=PERCENTAGE,
+        value_fn=lambda plant: plant.get("performance_ratio"),
+    ),
+    ShineMonitorSensorEntityDescription(
+        key="anomaly",
+        name="Production Anomaly",
+        device_class=SensorDeviceClass.ENUM,
+        options=STATUSES,
+        value_fn=lambda plant: plant.get("anomaly"),
+    ),
+)
+
+
+FLOW_SENSORS = (
+    ShineMonitorSensorEntityDescription(
+        key="grid_import",
+        name="Grid Import",
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL,
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        value_fn=lambda data: data.get("grid_import"),
+        daily=True,
+    ),
+    ShineMonitorSensorEntityDescription(
+        key="grid_export",
+        name="Grid Export",
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL,
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        value_fn=lambda data: data.get("grid_export"),
+        daily=True,
+    ),
+    ShineMonitorSensorEntityDescription(
+        key="battery_charge",
+        name="Battery Charge",
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL,
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        value_fn=lambda data: data.get("battery_charge"),
+        daily=True,
+    ),
+    ShineMonitorSensorEntityDescription(
+        key="battery_discharge",
+        name="Battery Discharge",
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL,
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        value_fn=lambda data: data.get("battery_discharge"),
+        daily=True,
+    ),
+    ShineMonitorSensorEntityDescription(
+        key="load",
+        name="Load Consumption",
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL,
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        value_fn=lambda data: data.get("load"),
+        daily=True,
+    ),
+)
+
+GROUP_SENSORS = (
+    ShineMonitorSensorEntityDescription(
+        key="current_power",
+        name="Current Solar Production",
+        device_class=SensorDeviceClass.POWER,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfPower.KILO_WATT,
+        value_fn=lambda group: group.get("current_power"),
+    ),
+    ShineMonitorSensorEntityDescription(
+        key="total_energy",
+        name="Total Solar Production",
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL,
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        value_fn=lambda group: group.get("total_energy"),
+        daily=True,
+    ),
+    ShineMonitorSensorEntityDescription(
+        key="profit",
+        name="Solar Profit",
+        device_class=SensorDeviceClass.MONETARY,
+        state_class=SensorStateClass.TOTAL,
+        native_unit_of_measurement="₹",
+        value_fn=lambda group: group.get("profit"),
+        daily=True,
+    ),
+    ShineMonitorSensorEntityDescription(
+        key="co2",
+        name="CO2 Reduction",
+        state_class=SensorStateClass.TOTAL,
+        native_unit_of_measurement=UnitOfMass.KILOGRAMS,
+        value_fn=lambda group: group.get("co2"),
+        daily=True,
+    ),
+)
+
+
+@dataclass(frozen=True, kw_only=True)
+class ShineMonitorDiagnosticSensorEntityDescription(SensorEntityDescription):
+    """Describes a Shine Monitor instrumentation sensor."""
+
+    value_fn: Callable[[Any], Any]
+
+
+DIAGNOSTIC_SENSORS = (
+    ShineMonitorDiagnosticSensorEntityDescription(
+        key="api_requests",
+        name="API Requests",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda coordinator: coordinator.client.metrics.total_requests,
+    ),
+    ShineMonitorDiagnosticSensorEntityDescription(
+        key="api_errors",
+        name="API Errors",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda coordinator: coordinator.client.metrics.total_errors,
+    ),
+    ShineMonitorDiagnosticSensorEntityDescription(
+        key="api_latency",
+        name="API Mean Latency",
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        value_fn=lambda coordinator: _milliseconds(
+            coordinator.client.metrics.mean_latency
+        ),
+    ),
+    ShineMonitorDiagnosticSensorEntityDescription(
+        key="refresh_duration",
+        name="Last Refresh Duration",
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        value_fn=lambda coordinator: _milliseconds(
+            coordinator.client.metrics.last_refresh_duration
+        ),
+    ),
+    ShineMonitorDiagnosticSensorEntityDescription(
+        key="reauth_count",
+        name="Reauthentications",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda coordinator: coordinator.client.metrics.reauth_count,
+    ),
+    ShineMonitorDiagnosticSensorEntityDescription(
+        key="throttled_requests",
+        name="Throttled Requests",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda coordinator: (
+            coordinator.client.scheduler.metrics["throttled"]
+            if coordinator.client.scheduler
+            else None
+        ),
+    ),
+)
+
+DEVICE_FIELD_UNITS = {
+    "V": (SensorDeviceClass.VOLTAGE, UnitOfElectricPotential.VOLT),
+    "A": (SensorDeviceClass.CURRENT, UnitOfElectricCurrent.AMPERE),
+    "W": (SensorDeviceClass.POWER, UnitOfPower.WATT),
+    "kW": (SensorDeviceClass.POWER, UnitOfPower.KILO_WATT),
+    "kWh": (SensorDeviceClass.ENERGY, UnitOfEnergy.KILO_WATT_HOUR),
+    "Hz": (SensorDeviceClass.FREQUENCY, UnitOfFrequency.HERTZ),
+    "°C": (SensorDeviceClass.TEMPERATURE, UnitOfTemperature.CELSIUS),
+    "℃": (SensorDeviceClass.TEMPERATURE, UnitOfTemperature.CELSIUS),
+}
+
+
 async def async_setup_entry(hass, config_entry, async_add_entities):
     """Set up Shine Monitor sensor platform from a config entry."""
     coordinator = hass.data[DOMAIN][config_entry.entry_id]
-    async_add_entities(
-        [
-            CurrentSolarPowerSensor(coordinator),
-            TotalSolarProductionSensor(coordinator),
-            ProfitSensor(coordinator),
-            CoalSavingSensor(coordinator),
-            CO2ReductionSensor(coordinator),
-            SO2ReductionSensor(coordinator),
+    added_plants = set()
+    added_fields = set()
+    added_flows = set()
+
+    @callback
+    def _async_add_plant_sensors():
+        """Add sensors for plants that appeared in the coordinator data."""
+        if coordinator.data is None:
+            return
+        new_plants = set(coordinator.data["plants"]) - added_plants
+        if not new_plants:
+            return
+        added_plants.update(new_plants)
+        async_add_entities(
+            ShineMonitorPowerSensor(
+                coordinator, plant_id, description, config_entry.entry_id
+            )
+            if description.key == "current_power"
+            else ShineMonitorPlantSensor(coordinator, plant_id, description)
+            for plant_id in sorted(new_plants)
+            for description in PLANT_SENSORS
+        )
+
+    @callback
+    def _async_add_flow_sensors():
+        """Add energy flow sensors for the flows plants started reporting.
+
+        Group totals of a flow are added with the first plant reporting it.
+        """
+        if coordinator.data is None:
+            return
+        new_flows = [
+            (plant_id, description)
+            for plant_id, plant in coordinator.data["plants"].items()
+            for description in FLOW_SENSORS
+            if plant.get(description.key) is not None
+            and (plant_id, description.key) not in added_flows
+        ]
+        if not new_flows:
+            return
+        entities = []
+        for plant_id, description in new_flows:
+            added_flows.add((plant_id, description.key))
+            entities.append(ShineMonitorPlantSensor(coordinator, plant_id, description))
+            if (None, description.key) not in added_flows:
+                added_flows.add((None, description.key))
+                entities.extend(
+                    ShineMonitorGroupSensor(
+                        coordinator, config_entry, key, name, description
+                    )
+                    for key, name in coordinator.aggregator.names.items()
+                )
+        async_add_entities(entities)
+
+    @callback
+    def _async_add_device_sensors():
+        """Add sensors for device fields that appeared in the coordinator data."""
+        if coordinator.data is None:
+            return
+        new_fields = [
+            (device_key, field)
+            for device_key, device in coordinator.data.get("devices", {}).items()
+            for field in device["fields"]
+            if (device_key, field) not in added_fields
         ]
+        if not new_fields:
+            return
+        added_fields.update(new_fields)
+        async_add_entities(
+            ShineMonitorDeviceSensor(coordinator, device_key, field)
+            for device_key, field in new_fields
+        )
+
+    async_add_entities(
+        ShineMonitorDiagnosticSensor(coordinator, config_entry, description)
+        for description in DIAGNOSTIC_SENSORS
+    )
+    async_add_entities(
+        ShineMonitorGroupSensor(coordinator, config_entry, key, name, description)
+        for key, name in coordinator.aggregator.names.items()
+        for description in GROUP_SENSORS
+    )
+    _async_add_plant_sensors()
+    _async_add_flow_sensors()
+    _async_add_device_sensors()
+    config_entry.async_on_unload(
+        coordinator.async_add_listener(_async_add_plant_sensors)
     )
+    config_entry.async_on_unload(
+        coordinator.async_add_listener(_async_add_flow_sensors)
+    )
+    config_entry.async_on_unload(
+        coordinator.async_add_listener(_async_add_device_sensors)
+    )
+
 
+class ShineMonitorSensorEntity(CoordinatorEntity, SensorEntity):
+    """Sensor that only writes its state when the value or availability changes.
 
-class ProfitSensor(CoordinatorEntity, SensorEntity):
-    """Representation of profit sensor."""
+    Subclasses compute their value in ``_compute_value``; it is cached in
+    ``_attr_native_value`` so unchanged coordinator ticks cost no state write.
+    After failed refreshes the last value stays available, flagged with a
+    ``stale`` attribute, for the coordinator's grace period.
+    """
+
+    _attr_has_entity_name = True
 
     def __init__(self, coordinator):
         """Initialize the sensor."""
         super().__init__(coordinator)
-        self._attr_name = "Solar Profit"
-        self._attr_unique_id = f"{coordinator.plant_id}_profit"
-        self._attr_device_class = SensorDeviceClass.MONETARY
-        self._attr_state_class = SensorStateClass.TOTAL_INCREASING
-        self._attr_native_unit_of_measurement = "₹"
+        self._last_written = None
+
+    def _compute_value(self):
+        """Return the current value from the coordinator data."""
+        raise NotImplementedError
 
     @property
-    def state(self):
-        """Return the state of the sensor."""
-        if self.coordinator.data is None:
-            return None
-        return self.coordinator.data.get("profit")
+    def available(self):
+        """Return whether the coordinator data may still be shown."""
+        return self.coordinator.data_usable
 
+    @property
+    def extra_state_attributes(self):
+        """Flag values that come from a failed refresh or a restored snapshot."""
+        if self.coordinator.is_stale:
+            return {"stale": True}
+        return None
 
-class LastUpdatedSensor(CoordinatorEntity, SensorEntity):
-    """Representation of the last updated date/time sensor."""
+    async def async_added_to_hass(self):
+        """Compute the initial value when added."""
+        self._attr_native_value = self._compute_value()
+        self._last_written = self._written_state()
+        await super().async_added_to_hass()
 
-    def __init__(self, coordinator):
-        """Initialize the sensor."""
-        super().__init__(coordinator)
-        self._attr_name = "Last Updated"
-        self._attr_unique_id = f"{coordinator.plant_id}_last_updated"
-        self._attr_device_class = SensorDeviceClass.TIMESTAMP
+    def _written_state(self):
+        """Return what a state write publishes besides the value."""
+        return (self.available, self.coordinator.is_stale, self.last_reset)
 
-    @property
-    def state(self):
-        """Return the state of the sensor."""
-        if self.coordinator.data is None:
-            return None
-        return dt_util.now().isoformat()
+    @callback
+    def _handle_coordinator_update(self):
+        """Write the state only if something changed."""
+        value = self._compute_value()
+        written = self._written_state()
+        if value == self._attr_native_value and written == self._last_written:
+            return
+        self._attr_native_value = value
+        self._last_written = written
+        self.async_write_ha_state()
 
 
-class CoalSavingSensor(CoordinatorEntity, SensorEntity):
-    """Representation of coal saving sensor."""
+class ShineMonitorPlantSensor(ShineMonitorSensorEntity):
+    """Representation of a plant-level sensor described by a description."""
 
-    def __init__(self, coordinator):
+    entity_description: ShineMonitorSensorEntityDescription
+
+    def __init__(self, coordinator, plant_id, description):
         """Initialize the sensor."""
         super().__init__(coordinator)
-        self._attr_name = "Coal Saving"
-        self._attr_unique_id = f"{coordinator.plant_id}_coal"
-        self._attr_state_class = SensorStateClass.TOTAL_INCREASING
-        self._attr_native_unit_of_measurement = UnitOfMass.KILOGRAMS
+        self.entity_description = description
+        self.plant_id = plant_id
+        self._attr_unique_id = f"{plant_id}_{description.key}"
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, plant_id)},
+            name=coordinator.plants.get(plant_id, plant_id),
+            manufacturer="Shine Monitor",
+            model="Plant",
+        )
 
     @property
-    def state(self):
-        """Return the state of the sensor."""
+    def plant_data(self):
+        """Return the latest data of this plant."""
         if self.coordinator.data is None:
             return None
-        return self.coordinator.data.get("coal")
+        return self.coordinator.data["plants"].get(self.plant_id)
+
+    @property
+    def last_reset(self):
+        """Return the local midnight a daily counter started from."""
+        if not self.entity_description.daily or self.plant_data is None:
+            return None
+        return _start_of_day(self.plant_data.get("date"))
 
+    def _compute_value(self):
+        """Return the value of this sensor from the plant data."""
+        if self.plant_data is None:
+            return None
+        return self.entity_description.value_fn(self.plant_data)
 
-class CO2ReductionSensor(CoordinatorEntity, SensorEntity):
-    """Representation of CO2 reduction sensor."""
 
-    def __init__(self, coordinator):
+class ShineMonitorPowerSensor(ShineMonitorPlantSensor):
+    """Current power sensor that also takes updates from the fast lane."""
+
+    def __init__(self, coordinator, plant_id, description, entry_id):
         """Initialize the sensor."""
-        super().__init__(coordinator)
-        self._attr_name = "CO2 Reduction"
-        self._attr_unique_id = f"{coordinator.plant_id}_co2"
-        self._attr_state_class = SensorStateClass.TOTAL_INCREASING
-        self._attr_native_unit_of_measurement = UnitOfMass.KILOGRAMS
+        super().__init__(coordinator, plant_id, description)
+        self._entry_id = entry_id
 
-    @property
-    def state(self):
-        """Return the state of the sensor."""
-        if self.coordinator.data is None:
-            return None
-        return self.coordinator.data.get("co2")
+    async def async_added_to_hass(self):
+        """Subscribe to fast lane updates."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass, fast_power_signal(self._entry_id), self._handle_fast_power
+            )
+        )
 
+    @callback
+    def _handle_fast_power(self, powers):
+        """Write the power of a fast lane tick if it changed."""
+        value = powers.get(self.plant_id)
+        if value is None or value == self._attr_native_value:
+            return
+        self._attr_native_value = value
+        self.async_write_ha_state()
 
-class SO2ReductionSensor(CoordinatorEntity, SensorEntity):
-    """Representation of SO2 reduction sensor."""
 
-    def __init__(self, coordinator):
+class ShineMonitorDeviceSensor(ShineMonitorSensorEntity):
+    """Representation of one telemetry field of a datalogger or inverter."""
+
+    def __init__(self, coordinator, device_key, field):
         """Initialize the sensor."""
         super().__init__(coordinator)
-        self._attr_name = "SO2 Reduction"
-        self._attr_unique_id = f"{coordinator.plant_id}_so2"
-        self._attr_state_class = SensorStateClass.TOTAL_INCREASING
-        self._attr_native_unit_of_measurement = UnitOfMass.KILOGRAMS
+        self.device_key = device_key
+        self.field = field
+        device = coordinator.data["devices"][device_key]
+        info = device["fields"][field]
+        self._attr_name = info["title"]
+        self._attr_unique_id = f"{device_key}_{field}"
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, device_key)},
+            name=device["name"],
+            manufacturer="Shine Monitor",
+            model=str(device["model"]),
+            via_device=(DOMAIN, device["plant_id"]),
+        )
 
-    @property
-    def state(self):
-        """Return the state of the sensor."""
+        unit = info["unit"]
+        device_class, native_unit = DEVICE_FIELD_UNITS.get(unit, (None, unit or None))
+        if unit == "%" and "soc" in f"{field} {info['title']}".lower():
+            device_class = SensorDeviceClass.BATTERY
+        if isinstance(info["value"], float):
+            self._attr_native_unit_of_measurement = native_unit
+            self._attr_device_class = device_class
+            self._attr_state_class = (
+                SensorStateClass.TOTAL_INCREASING
+                if device_class == SensorDeviceClass.ENERGY
+                else SensorStateClass.MEASUREMENT
+            )
+
+    def _compute_value(self):
+        """Return the latest value of the field."""
         if self.coordinator.data is None:
             return None
-        return self.coordinator.data.get("so2")
+        device = self.coordinator.data["devices"].get(self.device_key)
+        if device is None or self.field not in device["fields"]:
+            return None
+        value = device["fields"][self.field]["value"]
+        if self.state_class is not None and not isinstance(value, float):
+            return None
+        return value
 
 
-class CurrentSolarPowerSensor(CoordinatorEntity, SensorEntity):
-    """Representation of current solar power sensor."""
+class ShineMonitorGroupSensor(ShineMonitorSensorEntity):
+    """Representation of a total over the fleet or a plant group of an entry."""
 
-    def __init__(self, coordinator):
+    entity_description: ShineMonitorSensorEntityDescription
+
+    def __init__(self, coordinator, config_entry, group_key, group_name, description):
         """Initialize the sensor."""
         super().__init__(coordinator)
-        self._attr_name = "Current Solar Production"
-        self._attr_unique_id = f"{coordinator.plant_id}_current_power"
-        self._attr_device_class = SensorDeviceClass.POWER
-        self._attr_state_class = SensorStateClass.MEASUREMENT
-        self._attr_native_unit_of_measurement = UnitOfPower.KILO_WATT
+        self.entity_description = description
+        self.group_key = group_key
+        self._attr_unique_id = f"{config_entry.entry_id}_{group_key}_{description.key}"
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, f"{config_entry.entry_id}_{group_key}")},
+            name=group_name,
+            manufacturer="Shine Monitor",
+            model="Fleet" if group_key == FLEET else "Plant group",
+            entry_type=DeviceEntryType.SERVICE,
+        )
 
     @property
-    def state(self):
-        """Return the state of the sensor."""
+    def last_reset(self):
+        """Return the local midnight a daily total started from."""
+        if not self.entity_description.daily or self.coordinator.data is None:
+            return None
+        return _start_of_day(self.coordinator.data.get("date"))
+
+    def _compute_value(self):
+        """Return the total from the coordinator data."""
         if self.coordinator.data is None:
             return None
-        return self.coordinator.data.get("current_power")
+        group = self.coordinator.data.get("groups", {}).get(self.group_key)
+        if group is None:
+            return None
+        return self.entity_description.value_fn(group)
 
 
-class TotalSolarProductionSensor(CoordinatorEntity, SensorEntity):
-    """Representation of total solar production sensor."""
+class ShineMonitorDiagnosticSensor(ShineMonitorSensorEntity):
+    """Representation of a request metric of the account, disabled by default."""
 
-    def __init__(self, coordinator):
+    entity_description: ShineMonitorDiagnosticSensorEntityDescription
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(self, coordinator, config_entry, description):
         """Initialize the sensor."""
         super().__init__(coordinator)
-        self._attr_name = "Total Solar Production"
-        self._attr_unique_id = f"{coordinator.plant_id}_total_energy"
-        self._attr_device_class = SensorDeviceClass.ENERGY
-        self._attr_state_class = SensorStateClass.TOTAL_INCREASING
-        self._attr_native_unit_of_measurement = UnitOfEnergy.KILO_WATT_HOUR
+        self.entity_description = description
+        self._attr_unique_id = f"{config_entry.entry_id}_{description.key}"
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, config_entry.entry_id)},
+            name=config_entry.title,
+            manufacturer="Shine Monitor",
+            model="Account",
+            entry_type=DeviceEntryType.SERVICE,
+        )
 
     @property
-    def state(self):
-        """Return the state of the sensor."""
-        if self.coordinator.data is None:
-            return None
-        return self.coordinator.data.get("total_energy")
+    def available(self):
+        """Request metrics stay available while the cloud is unreachable."""
+        return True
+
+    @property
+    def extra_state_attributes(self):
+        """Return no attributes."""
+        return None
+
+    def _compute_value(self):
+        """Return the current metric value."""
+        return self.entity_description.value_fn(self.coordinator)
+
+
+def _start_of_day(day):
+    """Return the local midnight starting an ISO ``day``, if known."""
+    if day is None:
+        return None
+    return dt_util.start_of_local_day(date.fromisoformat(day))
+
+
+def _milliseconds(seconds):
+    """Convert seconds to rounded milliseconds."""
+    return None if seconds is None else round(seconds * 1000, 1)
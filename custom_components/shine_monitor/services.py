@@ -0,0 +1,243 @@
+"""Services for the Shine Monitor integration."""
+
+import importlib.util
+import logging
+
+import voluptuous as vol
+
+from homeassistant.core import HomeAssistant, ServiceCall, SupportsResponse
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from .backfill import ShineMonitorBackfill, parse_range
+from .const import DOMAIN
+from .export import FORMAT_CSV, FORMAT_PARQUET, FORMATS, ShineMonitorExport
+from .history import METRICS, RAW, RESOLUTIONS
+from .metrics import Profiler
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICE_BACKFILL_HISTORY = "backfill_history"
+SERVICE_SET_PROFILING = "set_profiling"
+SERVICE_QUERY_HISTORY = "query_history"
+SERVICE_AGGREGATE_HISTORY = "aggregate_history"
+SERVICE_EXPORT_HISTORY = "export_history"
+
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_PLANT_IDS = "plant_ids"
+ATTR_START_DATE = "start_date"
+ATTR_END_DATE = "end_date"
+ATTR_ENABLED = "enabled"
+ATTR_PLANT_ID = "plant_id"
+ATTR_METRIC = "metric"
+ATTR_START = "start"
+ATTR_END = "end"
+ATTR_RESOLUTION = "resolution"
+ATTR_FORMAT = "format"
+
+BACKFILL_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_PLANT_IDS): vol.All(cv.ensure_list, [cv.string]),
+        vol.Required(ATTR_START_DATE): cv.date,
+        vol.Optional(ATTR_END_DATE): cv.date,
+    }
+)
+
+EXPORT_SCHEMA = BACKFILL_SCHEMA.extend(
+    {vol.Optional(ATTR_FORMAT, default=FORMAT_CSV): vol.In(FORMATS)}
+)
+
+PROFILING_SCHEMA = vol.Schema({vol.Required(ATTR_ENABLED): cv.boolean})
+
+HISTORY_SCHEMA = {
+    vol.Required(ATTR_PLANT_ID): cv.string,
+    vol.Optional(ATTR_METRIC, default=METRICS[0]): vol.In(METRICS),
+    vol.Required(ATTR_START): cv.datetime,
+    vol.Optional(ATTR_END): cv.datetime,
+}
+
+QUERY_HISTORY_SCHEMA = vol.Schema(
+    {
+        **HISTORY_SCHEMA,
+        vol.Optional(ATTR_RESOLUTION): vol.In([RAW, *RESOLUTIONS]),
+    }
+)
+
+AGGREGATE_HISTORY_SCHEMA = vol.Schema(HISTORY_SCHEMA)
+
+
+def _target_coordinators(hass: HomeAssistant, call: ServiceCall):
+    """Return the coordinators addressed by a service call, keyed by entry id."""
+    coordinators = hass.data.get(DOMAIN, {})
+    entry_id = call.data.get(ATTR_CONFIG_ENTRY_ID)
+    if entry_id is None:
+        return dict(coordinators)
+    if entry_id not in coordinators:
+        raise HomeAssistantError(f"Shine Monitor entry {entry_id} is not loaded")
+    return {entry_id: coordinators[entry_id]}
+
+
+def _target_plants(hass: HomeAssistant, call: ServiceCall):
+    """Return ``{entry id: (coordinator, plant ids)}`` for a call on plants.
+
+    Plant ids are ``None`` when the call names no plant, meaning every plant
+    of the entry. Entries polling none of the named plants are left out, and
+    named plants no targeted entry polls are an error.
+    """
+    coordinators = _target_coordinators(hass, call)
+    plant_ids = call.data.get(ATTR_PLANT_IDS)
+    if plant_ids is None:
+        return {
+            entry_id: (coordinator, None) for entry_id, coordinator in coordinators.items()
+        }
+    targets = {}
+    for entry_id, coordinator in coordinators.items():
+        polled = [plant_id for plant_id in plant_ids if plant_id in coordinator.plants]
+        if polled:
+            targets[entry_id] = (coordinator, polled)
+    unknown = set(plant_ids).difference(
+        *(polled for _coordinator, polled in targets.values())
+    )
+    if unknown:
+        raise HomeAssistantError(
+            f"Shine Monitor plants {', '.join(sorted(unknown))} are not loaded"
+        )
+    return targets
+
+
+def _plant_coordinator(hass: HomeAssistant, plant_id):
+    """Return the coordinator polling ``plant_id``."""
+    for coordinator in hass.data.get(DOMAIN, {}).values():
+        if plant_id in coordinator.plants:
+            return coordinator
+    raise HomeAssistantError(f"Shine Monitor plant {plant_id} is not loaded")
+
+
+def _history_unavailable(plant_id):
+    """Return the error raised when the history of a plant cannot be read."""
+    return HomeAssistantError(f"The history of Shine Monitor plant {plant_id} is not open yet")
+
+
+def _history_range(call: ServiceCall):
+    """Return the ``[start, end)`` range of a history call as timestamps."""
+    start = dt_util.as_utc(call.data[ATTR_START]).timestamp()
+    end = dt_util.as_utc(call.data.get(ATTR_END) or dt_util.utcnow()).timestamp()
+    if end <= start:
+        raise HomeAssistantError("end must be after start")
+    return start, end
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the Shine Monitor services."""
+    backfills = {}
+    exports = {}
+    profiler = Profiler()
+
+    async def async_backfill_history(call: ServiceCall) -> None:
+        """Import historical production into long-term statistics."""
+        if "recorder" not in hass.config.components:
+            raise HomeAssistantError("The recorder integration is required")
+        start, end = parse_range(call.data[ATTR_START_DATE], call.data.get(ATTR_END_DATE))
+        for entry_id, (coordinator, plant_ids) in _target_plants(hass, call).items():
+            backfill = backfills.get(entry_id)
+            if backfill is None or backfill.coordinator is not coordinator:
+                backfill = backfills[entry_id] = ShineMonitorBackfill(
+                    hass, coordinator, entry_id
+                )
+            await backfill.async_run(start, end, plant_ids)
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_BACKFILL_HISTORY, async_backfill_history, schema=BACKFILL_SCHEMA
+    )
+
+    async def async_set_profiling(call: ServiceCall) -> None:
+        """Start or stop the cProfile hook, dumping the stats when stopped."""
+        if call.data[ATTR_ENABLED]:
+            profiler.start()
+            _LOGGER.warning("Shine Monitor profiling started")
+            return
+        profile = profiler.stop()
+        if profile is None:
+            return
+        path = hass.config.path(
+            f"{DOMAIN}_profile_{dt_util.utcnow().strftime('%Y%m%d%H%M%S')}.prof"
+        )
+        await hass.async_add_executor_job(profile.dump_stats, path)
+        _LOGGER.warning("Shine Monitor profile written to %s", path)
+
+    async def async_export_history(call: ServiceCall):
+        """Export the production history of plants to files in the config directory."""
+        export_format = call.data[ATTR_FORMAT]
+        if export_format == FORMAT_PARQUET and not await hass.async_add_executor_job(
+            importlib.util.find_spec, "pyarrow"
+        ):
+            raise HomeAssistantError("Parquet export requires the pyarrow package")
+        start, end = parse_range(call.data[ATTR_START_DATE], call.data.get(ATTR_END_DATE))
+        files = []
+        for entry_id, (coordinator, plant_ids) in _target_plants(hass, call).items():
+            export = exports.get(entry_id)
+            if export is None or export.coordinator is not coordinator:
+                export = exports[entry_id] = ShineMonitorExport(
+                    hass, coordinator, entry_id
+                )
+            files.extend(await export.async_run(start, end, export_format, plant_ids))
+        return {"files": files}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_EXPORT_HISTORY,
+        async_export_history,
+        schema=EXPORT_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_SET_PROFILING, async_set_profiling, schema=PROFILING_SCHEMA
+    )
+
+    async def async_query_history(call: ServiceCall):
+        """Return the stored samples or buckets of a plant metric."""
+        start, end = _history_range(call)
+        coordinator = _plant_coordinator(hass, call.data[ATTR_PLANT_ID])
+        points = await coordinator.history.async_query(
+            call.data[ATTR_PLANT_ID],
+            call.data[ATTR_METRIC],
+            start,
+            end,
+            call.data.get(ATTR_RESOLUTION),
+        )
+        if points is None:
+            raise _history_unavailable(call.data[ATTR_PLANT_ID])
+        for point in points:
+            key = "time" if "time" in point else "start"
+            point[key] = dt_util.utc_from_timestamp(point[key]).isoformat()
+        return {"points": points}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_QUERY_HISTORY,
+        async_query_history,
+        schema=QUERY_HISTORY_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    async def async_aggregate_history(call: ServiceCall):
+        """Return min, max, mean and integral of a plant metric over a range."""
+        start, end = _history_range(call)
+        coordinator = _plant_coordinator(hass, call.data[ATTR_PLANT_ID])
+        result = await coordinator.history.async_aggregate(
+            call.data[ATTR_PLANT_ID], call.data[ATTR_METRIC], start, end
+        )
+        if result is None:
+            raise _history_unavailable(call.data[ATTR_PLANT_ID])
+        return result
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_AGGREGATE_HISTORY,
+        async_aggregate_history,
+        schema=AGGREGATE_HISTORY_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
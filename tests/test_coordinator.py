@@ -0,0 +1,70 @@
+"""Tests for the Shine Monitor data update coordinator."""
+
+from custom_components.shine_monitor.coordinator import hold_stale_daily_counters
+
+
+def _cycle(previous, fetched, today):
+    """Run one refresh of a plant the way the coordinator merges it."""
+    data = dict(previous or {})
+    data.update(fetched)
+    return hold_stale_daily_counters(data, previous, fetched, today)
+
+
+def test_daily_counters_across_midnight():
+    """Yesterday's totals read 0 until the cloud restarts them."""
+    plant = _cycle(None, {"total_energy": 9.5, "grid_import": 2.0}, "2024-06-01")
+    plant = _cycle(plant, {"total_energy": 10.5, "grid_import": 2.5}, "2024-06-01")
+    assert plant["total_energy"] == 10.5
+    assert plant["rollover"] == {}
+
+    # The cloud still reports yesterday's totals after midnight.
+    plant = _cycle(plant, {"total_energy": 10.5, "grid_import": 2.5}, "2024-06-02")
+    assert plant["total_energy"] == 0.0
+    assert plant["grid_import"] == 0.0
+    assert plant["date"] == "2024-06-02"
+
+    # And again on the next cycle, e.g. from a cached response.
+    plant = _cycle(plant, {"total_energy": 10.5, "grid_import": 2.5}, "2024-06-02")
+    assert plant["total_energy"] == 0.0
+    assert plant["grid_import"] == 0.0
+
+    # A failed fetch keeps the counter at 0 rather than yesterday's value.
+    plant = _cycle(plant, {"grid_import": 2.5}, "2024-06-02")
+    assert plant["total_energy"] == 0.0
+
+    # The production counter restarts; the grid counter has not yet.
+    plant = _cycle(plant, {"total_energy": 0.2, "grid_import": 2.5}, "2024-06-02")
+    assert plant["total_energy"] == 0.2
+    assert plant["grid_import"] == 0.0
+
+    plant = _cycle(plant, {"total_energy": 0.8, "grid_import": 0.1}, "2024-06-02")
+    assert plant["total_energy"] == 0.8
+    assert plant["grid_import"] == 0.1
+    assert plant["rollover"] == {}
+
+    # Returning to the value of yesterday later in the day is kept.
+    plant = _cycle(plant, {"total_energy": 10.5, "grid_import": 2.5}, "2024-06-02")
+    assert plant["total_energy"] == 10.5
+    assert plant["grid_import"] == 2.5
+
+
+def test_daily_counter_stuck_over_two_midnights():
+    """A counter the cloud never restarts keeps reading 0 the next day."""
+    plant = _cycle(None, {"total_energy": 4.0}, "2024-06-01")
+    plant = _cycle(plant, {"total_energy": 4.0}, "2024-06-02")
+    plant = _cycle(plant, {"total_energy": 4.0}, "2024-06-03")
+    assert plant["total_energy"] == 0.0
+    assert plant["rollover"] == {"total_energy": 4.0}
+
+    plant = _cycle(plant, {"total_energy": 0.3}, "2024-06-03")
+    assert plant["total_energy"] == 0.3
+
+
+def test_daily_counter_restarted_by_cloud():
+    """A cloud restarting at midnight is followed right away."""
+    plant = _cycle(None, {"total_energy": 12.0, "current_power": 0.0}, "2024-06-01")
+    plant = _cycle(plant, {"total_energy": 0.0, "current_power": 0.0}, "2024-06-02")
+    assert plant["total_energy"] == 0.0
+    assert plant["rollover"] == {}
+    plant = _cycle(plant, {"total_energy": 0.1, "current_power": 0.4}, "2024-06-02")
+    assert plant["total_energy"] == 0.1